@@ -4,12 +4,17 @@ Grid actions.
 Should be used in replay and undo features.
 """
 
-from dataclasses import dataclass, field
+import sys
+from array import array
+from dataclasses import dataclass
+import layer_util
+from data_structures.referential_array import ArrayI
 from layer_util import Layer
 from grid import Grid
 
 @dataclass
 class PaintStep:
+    __slots__ = ("affected_grid_square", "affected_layer")
 
     affected_grid_square: tuple[int, int]
     affected_layer: Layer
@@ -17,31 +22,169 @@ class PaintStep:
     def undo_apply(self, grid: Grid):
         sq = grid[self.affected_grid_square[0]][self.affected_grid_square[1]]
         sq.erase(self.affected_layer)
+        grid.mark_dirty(*self.affected_grid_square)
 
     def redo_apply(self, grid: Grid):
         sq = grid[self.affected_grid_square[0]][self.affected_grid_square[1]]
         sq.add(self.affected_layer)
+        grid.mark_dirty(*self.affected_grid_square)
 
 
-@dataclass
 class PaintAction:
+    """
+    One paint (or special) action, as recorded for undo and replay.
+
+    Instead of a PaintStep per affected square, the action keeps brush stamps:
+    (x, y, radius, layer index) meaning every square within manhattan distance
+    radius of (x, y), inside bounds (the grid size when painted).
+    A single step is a stamp of radius 0. A special keeps no stamps, except
+    in SEQUENCE style where it keeps a step for every layer it removed, which
+    undoing it adds back (another special would remove a different layer).
+    The stamps are packed one after the other in an ArrayI of typecode "H"
+    (2 bytes per number, so x and y up to 65535), four numbers per stamp,
+    which doubles when full like the other array based structures, and are
+    read straight from there when applying the action.
+    PaintStep objects are only made if someone reads .steps.
+    """
+    __slots__ = ("numbers", "length", "bounds", "is_special")
+
+    NUMBERS_PER_STAMP = 4
+
+    def __init__(self, steps: list[PaintStep] | None = None, is_special: bool = False) -> None:
+        self.numbers = ArrayI(self.NUMBERS_PER_STAMP, "H")
+        # How many of self.numbers are used, four per stamp.
+        self.length = 0
+        self.bounds = None
+        self.is_special = is_special
+        for step in steps or ():
+            self.add_step(step)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, PaintAction):
+            return NotImplemented
+        return (self.stamps, self.bounds, self.is_special) == (other.stamps, other.bounds, other.is_special)
+
+    # Mutable and compared by value, as the dataclass it replaces was.
+    __hash__ = None
 
-    steps: list[PaintStep] = field(default_factory=list)
-    is_special: bool = False
+    def __repr__(self) -> str:
+        return f"PaintAction(stamps={self.stamps!r}, bounds={self.bounds!r}, is_special={self.is_special!r})"
+
+    @property
+    def stamps(self) -> array:
+        """
+        The numbers of every stamp, four per stamp, as an array('H') copy.
+
+        Time complexity:
+        O(k) where k is the number of stamps, copied in C
+        """
+        return self.numbers[:self.length]
+
+    @property
+    def steps(self) -> list[PaintStep]:
+        """
+        Every square painted by the action, as PaintSteps in the order they were painted.
+
+        Time complexity:
+        O(s) where s is the number of affected squares, the steps are made on each call
+        """
+        return [
+            PaintStep((i, j), layer_util.LAYERS[layer_index])
+            for i, j, layer_index in self.squares()
+        ]
+
+    def squares(self):
+        """
+        Yields (x, y, layer index) for every square painted by the action,
+        clipped to self.bounds, in the order they were painted.
+        """
+        numbers = iter(self.stamps)
+        for x, y, radius, layer_index in zip(numbers, numbers, numbers, numbers):
+            if radius == 0:
+                yield x, y, layer_index
+                continue
+            for i in range(max(0, x - radius), min(self.bounds[0], x + radius + 1)):
+                reach = radius - abs(i - x)
+                for j in range(max(0, y - reach), min(self.bounds[1], y + reach + 1)):
+                    yield i, j, layer_index
 
     def undo_apply(self, grid: Grid):
-        if self.is_special:
+        if self.is_special and grid.draw_style != Grid.DRAW_STYLE_SEQUENCE:
             grid.special()
             return
-        for step in self.steps:
-            step.undo_apply(grid)
+        if self.is_special:
+            for i, j, layer_index in self.squares():
+                grid[i][j].add(layer_util.LAYERS[layer_index])
+                grid.mark_dirty(i, j)
+            grid.blank_special = not grid.blank_special
+            return
+        for i, j, layer_index in self.squares():
+            grid[i][j].erase(layer_util.LAYERS[layer_index])
+            grid.mark_dirty(i, j)
 
     def redo_apply(self, grid: Grid):
         if self.is_special:
             grid.special()
             return
-        for step in self.steps:
-            step.redo_apply(grid)
+        for i, j, layer_index in self.squares():
+            grid[i][j].add(layer_util.LAYERS[layer_index])
+            grid.mark_dirty(i, j)
+
+    def cell_count(self, grid: Grid) -> int:
+        """
+        Number of squares the action touches on grid, every painted square for a special.
+
+        Time complexity:
+        O(s) where s is the number of affected squares, O(1) for a special
+        """
+        if self.is_special:
+            return len(grid.squares)
+        return sum(1 for _ in self.squares())
+
+    def nbytes(self) -> int:
+        """
+        Memory held by the action, the object itself plus its stamp array.
+
+        Time complexity:
+        O(1)
+        """
+        return sys.getsizeof(self) + sys.getsizeof(self.numbers) + sys.getsizeof(self.numbers.array)
+
+    @classmethod
+    def special(cls, grid: Grid) -> PaintAction:
+        """
+        Apply the special to grid, and return it as an action that can be undone.
+
+        Time complexity:
+        O(p) where p is the number of painted squares, for grid.special
+        """
+        action = cls(is_special=True)
+        for x, y, layer in grid.special():
+            action.add_step(PaintStep((x, y), layer))
+        return action
 
     def add_step(self, step: PaintStep):
-        self.steps.append(step)
+        x, y = step.affected_grid_square
+        self.push_stamp(x, y, 0, step.affected_layer.index)
+
+    def add_stamp(self, center: tuple[int, int], radius: int, layer: Layer, bounds: tuple[int, int]):
+        """
+        Record painting layer on every square within manhattan distance radius
+        of center, that is inside [0, bounds[0]) x [0, bounds[1]).
+        """
+        self.bounds = bounds
+        self.push_stamp(center[0], center[1], radius, layer.index)
+
+    def push_stamp(self, x: int, y: int, radius: int, layer_index: int) -> None:
+        """
+        Append the numbers of one stamp, doubling self.numbers if it is full.
+
+        Time complexity:
+        O(1) amortised, O(k) for k stamps when the array is resized by one bulk copy
+        """
+        if self.length + self.NUMBERS_PER_STAMP > len(self.numbers):
+            new_numbers = ArrayI(2 * len(self.numbers), "H")
+            new_numbers[:self.length] = self.numbers[:self.length]
+            self.numbers = new_numbers
+        self.numbers[self.length:self.length + self.NUMBERS_PER_STAMP] = array("H", (x, y, radius, layer_index))
+        self.length += self.NUMBERS_PER_STAMP
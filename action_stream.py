@@ -0,0 +1,107 @@
+"""
+Action stream.
+Lets a ReplayTracker play actions pulled lazily from any iterable of
+(PaintAction, is_undo), such as session_log.read_session_log, instead of
+holding them all, so a replay of any length needs constant memory.
+"""
+from __future__ import annotations
+
+from typing import Iterable
+from action import PaintAction
+from data_structures.deque_adt import GrowableDeque
+
+
+class ActionStream:
+    """
+    The actions of an iterable, read read_ahead at a time into a small buffer,
+    indexed like the deque ReplayTracker keeps: actions[i] is the i-th action.
+
+    Reading an action drops every action before it, so the stream only goes
+    forward and reading one already dropped raises IndexError. Actions
+    appended come after everything in the source.
+    """
+
+    DEFAULT_READ_AHEAD = 64
+
+    def __init__(self, source: Iterable[tuple[PaintAction, bool]], read_ahead: int = DEFAULT_READ_AHEAD) -> None:
+        if read_ahead < 1:
+            raise ValueError("read_ahead must be at least 1")
+        self.source = iter(source)
+        self.read_ahead = read_ahead
+        self.buffer = GrowableDeque(read_ahead)
+        # The index of the first action in the buffer, the ones before are dropped.
+        self.base = 0
+        self.appended = GrowableDeque()
+        self.exhausted = False
+
+    def __len__(self) -> int:
+        """
+        The number of actions read so far, played or buffered,
+        which is every action once the source is exhausted.
+        """
+        return self.base + len(self.buffer) + len(self.appended)
+
+    def has(self, index: int) -> bool:
+        """
+        Whether there is an action at index, reading up to it from the source if needed.
+
+        Time complexity:
+        O(r) amortised per action read, for r = read_ahead
+        """
+        while True:
+            self.drop_before(index)
+            if self.base + len(self.buffer) > index:
+                return True
+            if not self.fill():
+                return False
+
+    def __getitem__(self, index: int) -> tuple[PaintAction, bool]:
+        """
+        The action at index, dropping every action before it.
+        :raises IndexError: if it was dropped already or there is no such action
+        """
+        if index < self.base:
+            raise IndexError("Action stream has already gone past this action")
+        if not self.has(index):
+            raise IndexError("Action stream index out of range")
+        return self.buffer[index - self.base]
+
+    def drop_before(self, index: int) -> None:
+        """Forget the buffered actions before index."""
+        while self.base < index and len(self.buffer) > 0:
+            self.buffer.serve()
+            self.base += 1
+
+    def fill(self) -> bool:
+        """
+        Read up to read_ahead more actions into the buffer,
+        then from the appended actions once the source runs out.
+        Returns whether any action was read.
+        """
+        count = len(self.buffer)
+        while not self.exhausted and len(self.buffer) < count + self.read_ahead:
+            try:
+                self.buffer.append(next(self.source))
+            except StopIteration:
+                self.exhausted = True
+        if self.exhausted:
+            while len(self.appended) > 0 and len(self.buffer) < count + self.read_ahead:
+                self.buffer.append(self.appended.serve())
+        return len(self.buffer) > count
+
+    def append(self, item: tuple[PaintAction, bool]) -> None:
+        """Add an action after every other action in the stream."""
+        self.appended.append(item)
+
+    def serve(self) -> None:
+        """
+        Drop the first action, the others moving down one index,
+        like serving it from a deque.
+        """
+        if self.base > 0:
+            # it was dropped already, only the numbering changes
+            self.base -= 1
+        elif self.has(0):
+            self.buffer.serve()
+        else:
+            raise IndexError("Action stream is empty")
@@ -0,0 +1,68 @@
+"""
+Time and memory allocated per AdditiveLayerStore.get_color call.
+Rainbow is time dependent, so none of the colours are remembered and
+every call walks the layers.
+The baseline is how get_color used to walk them: serving every layer out of
+its CircularQueue into a freshly allocated CircularQueue(max_capacity=100),
+and swapping the queues, instead of iterating the deque in place.
+
+python -m benchmarks.bench_additive_color
+"""
+import time
+import tracemalloc
+
+from data_structures.queue_adt import CircularQueue
+from layer_store import AdditiveLayerStore
+from layers import rainbow, lighten, invert, darken
+
+CALLS = 10000
+LAYERS = (rainbow, lighten, invert, darken)
+
+
+class SwappingQueueColor:
+    """The layers in a CircularQueue, coloured the way get_color used to."""
+
+    def __init__(self) -> None:
+        self.layer_list = CircularQueue(max_capacity=100)
+        for layer in LAYERS:
+            self.layer_list.append(layer)
+
+    def get_color(self, start, timestamp, x, y):
+        color = start
+        temporary_q = CircularQueue(max_capacity=100)
+        while not self.layer_list.is_empty():
+            layer = self.layer_list.serve()
+            temporary_q.append(layer)
+            color = layer.apply(color, timestamp, x, y)
+        self.layer_list = temporary_q
+        return color
+
+
+def measure(store) -> tuple[float, int]:
+    """Seconds per get_color call, and the peak bytes allocated by one call."""
+    store.get_color((255, 255, 255), 0, 0, 0)
+    tracemalloc.start()
+    store.get_color((255, 255, 255), 1, 2, 3)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for timestamp in range(CALLS):
+        store.get_color((255, 255, 255), timestamp, 2, 3)
+    return (time.perf_counter() - start) / CALLS, peak
+
+
+if __name__ == "__main__":
+    store = AdditiveLayerStore()
+    for layer in LAYERS:
+        store.add(layer)
+    baseline = SwappingQueueColor()
+    if baseline.get_color((255, 255, 255), 7, 2, 3) != store.get_color((255, 255, 255), 7, 2, 3):
+        raise AssertionError("The baseline gives a different colour")
+
+    for name, colored in (("swapped queue", baseline), ("in place", store)):
+        per_call, peak = measure(colored)
+        print(
+            f"{name:>13}, get_color with {len(LAYERS)} layers: {per_call * 1e6:7.2f} us per call, "
+            f"{peak} bytes peak allocation per call"
+        )
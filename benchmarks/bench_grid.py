@@ -0,0 +1,35 @@
+"""
+Time and memory taken to build a grid of each draw style, paint one square
+in every PAINT_EVERY, and special the whole grid.
+
+python -m benchmarks.bench_grid
+"""
+import time
+import tracemalloc
+
+from grid import Grid
+from layers import black, lighten, invert
+
+SIZES = (128, 512)
+PAINT_EVERY = 16
+
+if __name__ == "__main__":
+    for size in SIZES:
+        for style in Grid.DRAW_STYLE_OPTIONS:
+            tracemalloc.start()
+            start = time.perf_counter()
+            grid = Grid(style, size, size)
+            built = time.perf_counter() - start
+            for square in range(0, size * size, PAINT_EVERY):
+                for layer in (black, lighten, invert):
+                    grid[square % size][square // size].add(layer)
+            memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            start = time.perf_counter()
+            grid.special()
+            special = time.perf_counter() - start
+            print(
+                f"{style:>8} {size}x{size}: built in {built * 1000:9.2f} ms, "
+                f"{memory / 2**20:8.2f} MiB once 1/{PAINT_EVERY} painted, special {special * 1000:9.2f} ms"
+            )
+            del grid
@@ -0,0 +1,66 @@
+"""
+Memory taken by the actions of a painting session, kept for undo / replay:
+PAINTS brush paints of radius Grid.MAX_BRUSH plus SPECIALS specials on a
+SIZE x SIZE grid. Compares a PaintStep per affected square (how actions used
+to be stored) with PaintAction's stamps.
+
+python -m benchmarks.bench_history
+"""
+import random
+import tracemalloc
+
+from action import PaintAction, PaintStep
+from grid import Grid
+from layers import black, lighten, invert
+
+SIZE = 512
+PAINTS = 2000
+SPECIALS = 10
+
+def session(rng):
+    """Yields (center, layer) for each paint, None for each special."""
+    events = [None] * SPECIALS + [
+        ((rng.randrange(SIZE), rng.randrange(SIZE)), rng.choice((black, lighten, invert)))
+        for _ in range(PAINTS)
+    ]
+    rng.shuffle(events)
+    return events
+
+def record_steps(events):
+    actions = []
+    for event in events:
+        steps = []
+        if event is None:
+            for i in range(SIZE):
+                for j in range(SIZE):
+                    steps.append(PaintStep((i, j), None))
+        else:
+            (px, py), layer = event
+            radius = Grid.MAX_BRUSH
+            for i in range(max(0, px - radius), min(SIZE, px + radius + 1)):
+                for j in range(max(0, py - radius), min(SIZE, py + radius + 1)):
+                    if abs(i - px) + abs(j - py) <= radius:
+                        steps.append(PaintStep((i, j), layer))
+        actions.append(steps)
+    return actions
+
+def record_stamps(events):
+    actions = []
+    for event in events:
+        if event is None:
+            actions.append(PaintAction(is_special=True))
+        else:
+            action = PaintAction()
+            action.add_stamp(event[0], Grid.MAX_BRUSH, event[1], (SIZE, SIZE))
+            actions.append(action)
+    return actions
+
+if __name__ == "__main__":
+    events = session(random.Random(0))
+    for name, record in (("PaintStep per square", record_steps), ("stamps", record_stamps)):
+        tracemalloc.start()
+        actions = record(events)
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del actions
+        print(f"{name:>20}: {memory / 2**20:9.2f} MiB for {PAINTS} paints and {SPECIALS} specials on {SIZE}x{SIZE}")
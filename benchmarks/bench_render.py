@@ -0,0 +1,35 @@
+"""
+Grid.render on a large grid: the first (full) frame, then frames of a static
+painting, then frames with a few animated squares.
+
+python -m benchmarks.bench_render
+"""
+import timeit
+
+from action import PaintStep
+from grid import Grid
+from layers import lighten, black, rainbow
+
+SIZE = 256
+FRAMES = 20
+
+def paint(grid: Grid, layer, every):
+    for x in range(0, grid.x, every):
+        for y in range(0, grid.y, every):
+            PaintStep((x, y), layer).redo_apply(grid)
+
+if __name__ == "__main__":
+    for style in Grid.DRAW_STYLE_OPTIONS:
+        grid = Grid(style, SIZE, SIZE)
+        paint(grid, black, 2)
+        paint(grid, lighten, 3)
+        full = timeit.timeit(lambda: grid.render(0, (255, 255, 255)), number=1)
+        static = timeit.timeit(lambda: grid.render(1, (255, 255, 255)), number=FRAMES) / FRAMES
+        paint(grid, rainbow, 16)
+        grid.render(2, (255, 255, 255))
+        animated = timeit.timeit(lambda: grid.render(3, (255, 255, 255)), number=FRAMES) / FRAMES
+        print(
+            f"{style:>8} {SIZE}x{SIZE}: first frame {full * 1000:8.2f} ms, "
+            f"static {static * 1000:6.3f} ms/frame, "
+            f"{len(grid.animated_squares)} animated {animated * 1000:6.3f} ms/frame"
+        )
@@ -0,0 +1,33 @@
+"""
+Frames per second of the headless renderer exporting a replay as PNG
+frames, rendered in this process and in pools of worker processes.
+
+python -m benchmarks.bench_render_workers
+"""
+import os
+import random
+import time
+
+from action import PaintAction
+from grid import Grid
+from layers import black, lighten, rainbow, sparkle
+from render import encode_session
+
+SIZE = 128
+ACTIONS = 400
+ACTIONS_PER_FRAME = 4
+
+if __name__ == "__main__":
+    rng = random.Random(0)
+    source = []
+    for _ in range(ACTIONS):
+        action = PaintAction()
+        action.add_stamp((rng.randrange(SIZE), rng.randrange(SIZE)), Grid.MAX_BRUSH, rng.choice((black, lighten, rainbow, sparkle)), (SIZE, SIZE))
+        source.append((action, False))
+    for workers in sorted({1, 2, 4, os.cpu_count() or 1}):
+        start = time.perf_counter()
+        frames = sum(1 for _ in encode_session(
+            source, Grid.DRAW_STYLE_ADD, (SIZE, SIZE), ACTIONS_PER_FRAME, image_format="png", workers=workers
+        ))
+        taken = time.perf_counter() - start
+        print(f"{workers:>3} workers: {frames / taken:8.1f} frames/s, {frames} frames of {SIZE}x{SIZE}")
@@ -0,0 +1,52 @@
+"""
+Time taken by ReplayTracker.seek to random steps of a long replay, with
+keyframes every Keyframes.DEFAULT_EVERY_ACTIONS actions and with only the
+starting grid kept (so every backwards seek replays from the start),
+and the memory taken by one keyframe of the fully painted grid.
+
+python -m benchmarks.bench_seek
+"""
+import random
+import time
+import tracemalloc
+
+from action import PaintAction
+from grid import Grid
+from keyframes import Keyframes
+from layers import black, lighten, invert
+from replay import ReplayTracker
+
+SIZE = 128
+ACTIONS = 2000
+SEEKS = 50
+
+if __name__ == "__main__":
+    rng = random.Random(0)
+    actions = []
+    for _ in range(ACTIONS):
+        action = PaintAction()
+        action.add_stamp((rng.randrange(SIZE), rng.randrange(SIZE)), Grid.MAX_BRUSH, rng.choice((black, lighten, invert)), (SIZE, SIZE))
+        actions.append(action)
+    steps = [rng.randrange(ACTIONS + 1) for _ in range(SEEKS)]
+    for name, keyframes in (
+        ("keyframes", Keyframes()),
+        ("start only", Keyframes(every_actions=ACTIONS + 1, every_cells=ACTIONS * SIZE * SIZE)),
+    ):
+        replay = ReplayTracker(keyframes)
+        for action in actions:
+            replay.add_action(action)
+        replay.start_replay()
+        grid = Grid(Grid.DRAW_STYLE_ADD, SIZE, SIZE)
+        # Play it through once, as the replay would, to take the keyframes.
+        replay.seek(grid, ACTIONS)
+        start = time.perf_counter()
+        for step in steps:
+            replay.seek(grid, step)
+        taken = (time.perf_counter() - start) / SEEKS
+        print(f"{name:>10}: {taken * 1000:9.2f} ms per seek, {ACTIONS} actions on {SIZE}x{SIZE}")
+
+    tracemalloc.start()
+    snapshot = grid.snapshot()
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"  keyframe: {memory / 1024:9.2f} KiB for {len(grid.squares)} painted squares")
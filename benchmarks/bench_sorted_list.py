@@ -0,0 +1,33 @@
+"""
+Time taken by ArraySortedList for insert / delete heavy workloads:
+fill a list to SIZE, then repeatedly delete a random item and add a new
+one, then empty it again. Also reports the capacity left at the end.
+
+python -m benchmarks.bench_sorted_list
+"""
+import random
+import time
+
+from data_structures.array_sorted_list import ArraySortedList
+from data_structures.sorted_list_adt import ListItem
+
+SIZES = (10, 100, 10000)
+CHURN = 2000
+
+if __name__ == "__main__":
+    rng = random.Random(0)
+    for size in SIZES:
+        sorted_list = ArraySortedList(1)
+        start = time.perf_counter()
+        for i in range(size):
+            sorted_list.add(ListItem(i, rng.random()))
+        for i in range(CHURN):
+            sorted_list.delete_at_index(rng.randrange(len(sorted_list)))
+            sorted_list.add(ListItem(i, rng.random()))
+        while len(sorted_list) > 0:
+            sorted_list.delete_at_index(rng.randrange(len(sorted_list)))
+        taken = time.perf_counter() - start
+        print(
+            f"{size:>6} items, {CHURN} delete + add: {taken * 1000:9.2f} ms, "
+            f"capacity {len(sorted_list.array)} once empty"
+        )
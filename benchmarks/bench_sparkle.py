@@ -0,0 +1,34 @@
+"""
+Sparkle over every square of a 128x128 grid:
+the original step by step LCG, the jump table version, and the array kernel.
+
+python -m benchmarks.bench_sparkle
+"""
+import timeit
+
+from layers import sparkle, sparkle_loop, np
+
+SIZE = 128
+FRAMES = 5
+
+def frame(apply):
+    for timestamp in range(FRAMES):
+        for x in range(SIZE):
+            for y in range(SIZE):
+                apply((100, 100, 100), timestamp, x, y)
+
+def frame_array(colors, xs, ys):
+    for timestamp in range(FRAMES):
+        sparkle.apply_array(colors, timestamp, xs, ys)
+
+if __name__ == "__main__":
+    loop = min(timeit.repeat(lambda: frame(sparkle_loop), number=1, repeat=3)) / FRAMES
+    print(f"{SIZE}x{SIZE} loop:   {loop * 1000:8.2f} ms/frame")
+    jump = min(timeit.repeat(lambda: frame(sparkle.apply), number=1, repeat=3)) / FRAMES
+    print(f"{SIZE}x{SIZE} jumps:  {jump * 1000:8.2f} ms/frame ({loop / jump:.1f}x)")
+    if np is not None:
+        xs, ys = np.meshgrid(np.arange(SIZE), np.arange(SIZE))
+        xs, ys = xs.ravel(), ys.ravel()
+        colors = np.full((SIZE * SIZE, 3), 100)
+        array = min(timeit.repeat(lambda: frame_array(colors, xs, ys), number=1, repeat=3)) / FRAMES
+        print(f"{SIZE}x{SIZE} kernel: {array * 1000:8.2f} ms/frame ({loop / array:.1f}x)")
@@ -0,0 +1,62 @@
+"""
+Time taken by Grid.special on a SEQUENCE grid with every square painted
+with every layer, one special after another until the squares are empty.
+Compares SequenceLayerStore.special, which finds the median through the
+name ordered bitmask, with the sorted list it replaced (sorting the applied
+layers by name on every call), as the baseline.
+
+python -m benchmarks.bench_special
+"""
+import time
+
+from grid import Grid
+from layer_store import SequenceLayerStore
+from layer_util import get_layers
+
+SIZE = 256
+
+
+class SortedSpecialStore(SequenceLayerStore):
+    """SequenceLayerStore with the special from before the name ordered bitmask."""
+
+    def special(self):
+        by_name = sorted(self.applied_layers(), key=lambda layer: layer.name)
+        if len(by_name) == 0:
+            return None
+        if len(by_name) % 2 == 0:
+            median_index = (len(by_name) // 2) - 1
+        else:
+            median_index = len(by_name) // 2
+        self.erase(by_name[median_index])
+        return by_name[median_index]
+
+
+def time_specials(layers) -> list[float]:
+    """Seconds taken by each Grid.special until every square is empty."""
+    grid = Grid(Grid.DRAW_STYLE_SEQUENCE, SIZE, SIZE)
+    for x in range(SIZE):
+        for y in range(SIZE):
+            for layer in layers:
+                grid[x][y].add(layer)
+    taken = []
+    for _ in layers:
+        start = time.perf_counter()
+        grid.special()
+        taken.append(time.perf_counter() - start)
+    return taken
+
+
+if __name__ == "__main__":
+    layers = [layer for layer in get_layers() if layer is not None]
+    bitmask = time_specials(layers)
+    Grid.LAYER_STORES[Grid.DRAW_STYLE_SEQUENCE] = SortedSpecialStore
+    try:
+        sorted_list = time_specials(layers)
+    finally:
+        Grid.LAYER_STORES[Grid.DRAW_STYLE_SEQUENCE] = SequenceLayerStore
+    for applied, before, after in zip(range(len(layers), 0, -1), sorted_list, bitmask):
+        print(
+            f"SEQUENCE {SIZE}x{SIZE}, {applied:2} layers applied: "
+            f"sorted list {before * 1000:9.2f} ms, bitmask {after * 1000:9.2f} ms"
+        )
+    print(f"total: sorted list {sum(sorted_list) * 1000:9.2f} ms, bitmask {sum(bitmask) * 1000:9.2f} ms")
@@ -2,6 +2,7 @@
     Array-based implementation of SortedList ADT.
     Items to store should be of time ListItem.
 """
+from __future__ import annotations
 
 from data_structures.referential_array import ArrayR
 from data_structures.sorted_list_adt import *
@@ -57,34 +58,47 @@ class ArraySortedList(SortedList[T]):
         return False
 
     def _shuffle_right(self, index: int) -> None:
-        """ Shuffle items to the right up to a given position. """
-        for i in range(len(self), index, -1):
-            self.array[i] = self.array[i - 1]
+        """ Shuffle items to the right up to a given position.
+        :complexity: O(n - index), as one bulk move of the array
+        """
+        self.array.move(index, index + 1, len(self) - index)
 
     def _shuffle_left(self, index: int) -> None:
-        """ Shuffle items starting at a given position to the left. """
-        for i in range(index, len(self)):
-            self.array[i] = self.array[i + 1]
-
-    def _resize(self) -> None:
-        """ Resize the list. """
-        # doubling the size of our list
-        new_array = ArrayR(2 * len(self.array))
+        """ Shuffle items starting at a given position to the left.
+        :complexity: O(n - index), as one bulk move of the array
+        """
+        self.array.move(index + 1, index, len(self) - index)
+        # forget the reference left behind in the last slot
+        self.array[len(self)] = None
+
+    def _resize(self, capacity: int | None = None) -> None:
+        """ Resize the list, doubling it unless told the new capacity.
+        :complexity: O(n), as one bulk copy of the array
+        :pre: capacity holds every item of the list
+        """
+        if capacity is None:
+            capacity = 2 * len(self.array)
+        new_array = ArrayR(capacity)
 
         # copying the contents
-        for i in range(self.length):
-            new_array[i] = self.array[i]
+        new_array[:self.length] = self.array[:self.length]
 
         # referring to the new array
         self.array = new_array
 
     def delete_at_index(self, index: int) -> ListItem:
-        """ Delete item at a given position. """
+        """ Delete item at a given position.
+        Halves the array once it is under a quarter full, so that a list
+        which grew and then emptied does not keep its largest size.
+        :complexity: O(n - index) amortised
+        """
         if index >= len(self):
             raise IndexError('No such index in the list')
         item = self.array[index]
         self.length -= 1
         self._shuffle_left(index)
+        if len(self) < len(self.array) // 4 and len(self.array) // 2 >= self.MIN_CAPACITY:
+            self._resize(len(self.array) // 2)
         return item
 
     def index(self, item: ListItem) -> int:
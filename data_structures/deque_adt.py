@@ -0,0 +1,364 @@
+""" Deque ADT as a circular array with a direction flag.
+
+Defines a double-ended circular queue whose order can be reversed in O(1),
+by flipping which end of the array counts as the front, instead of moving
+any element. Also defines UnitTests for the class.
+"""
+__docformat__ = 'reStructuredText'
+
+import unittest
+from typing import Iterator
+from data_structures.queue_adt import CircularQueue
+from data_structures.referential_array import ArrayR, T
+
+class CircularDeque(CircularQueue[T]):
+    """ Circular implementation of a double-ended queue with arrays.
+
+    Attributes:
+         length (int): number of elements in the deque (inherited)
+         front (int): index of the first element in the array (inherited)
+         rear (int): index of the first empty space after the last element in the array (inherited)
+         array (ArrayR[T]): array storing the elements of the deque (inherited)
+         reversed (bool): if True the logical front of the deque is the element
+            just before rear, and the logical rear is the element at front
+
+    front and rear always describe the array itself, only the methods look
+    at reversed to decide which end they work on.
+    Slots are set back to None when their element is removed, so the deque
+    never keeps a removed element alive.
+    """
+
+    def __init__(self, max_capacity: int) -> None:
+        CircularQueue.__init__(self, max_capacity)
+        self.reversed = False
+
+    def push_rear(self, item: T) -> None:
+        """ Adds an element after the last element of the array.
+        :complexity: O(1)
+        :raises Exception: if the deque is full
+        """
+        if self.is_full():
+            raise Exception("Queue is full")
+        self.array[self.rear] = item
+        self.length += 1
+        self.rear = (self.rear + 1) % len(self.array)
+
+    def push_front(self, item: T) -> None:
+        """ Adds an element before the first element of the array.
+        :complexity: O(1)
+        :raises Exception: if the deque is full
+        """
+        if self.is_full():
+            raise Exception("Queue is full")
+        self.front = (self.front - 1) % len(self.array)
+        self.array[self.front] = item
+        self.length += 1
+
+    def pop_rear(self) -> T:
+        """ Deletes and returns the last element of the array.
+        :complexity: O(1)
+        :raises Exception: if the deque is empty
+        """
+        if self.is_empty():
+            raise Exception("Queue is empty")
+        self.rear = (self.rear - 1) % len(self.array)
+        self.length -= 1
+        item = self.array[self.rear]
+        self.array[self.rear] = None
+        return item
+
+    def pop_front(self) -> T:
+        """ Deletes and returns the first element of the array.
+        :complexity: O(1)
+        :raises Exception: if the deque is empty
+        """
+        if self.is_empty():
+            raise Exception("Queue is empty")
+        item = self.array[self.front]
+        self.array[self.front] = None
+        self.front = (self.front + 1) % len(self.array)
+        self.length -= 1
+        return item
+
+    def append(self, item: T) -> None:
+        """ Adds an element to the rear of the deque, honouring reversed.
+        :complexity: O(1)
+        :raises Exception: if the deque is full
+        """
+        if self.reversed:
+            self.push_front(item)
+        else:
+            self.push_rear(item)
+
+    def append_left(self, item: T) -> None:
+        """ Adds an element to the front of the deque, honouring reversed.
+        :complexity: O(1)
+        :raises Exception: if the deque is full
+        """
+        if self.reversed:
+            self.push_rear(item)
+        else:
+            self.push_front(item)
+
+    def serve(self) -> T:
+        """ Deletes and returns the element at the deque's front, honouring reversed.
+        :complexity: O(1)
+        :raises Exception: if the deque is empty
+        """
+        if self.reversed:
+            return self.pop_rear()
+        return self.pop_front()
+
+    def pop(self) -> T:
+        """ Deletes and returns the element at the deque's rear, honouring reversed.
+        :complexity: O(1)
+        :raises Exception: if the deque is empty
+        """
+        if self.reversed:
+            return self.pop_front()
+        return self.pop_rear()
+
+    def reverse(self) -> None:
+        """ Reverses the order of the deque without moving any element.
+        :complexity: O(1)
+        """
+        self.reversed = not self.reversed
+
+    def __getitem__(self, index: int) -> T:
+        """ Returns the element index places from the deque's front, honouring reversed.
+        :complexity: O(1)
+        :raises IndexError: if index is not in [0, len(self))
+        """
+        if not 0 <= index < len(self):
+            raise IndexError("Deque index out of range")
+        if self.reversed:
+            index = len(self) - 1 - index
+        return self.array[(self.front + index) % len(self.array)]
+
+    def __iter__(self) -> Iterator[T]:
+        """ Yields the elements from the deque's front to its rear, honouring reversed.
+        :complexity: O(1) per element, nothing is copied
+        """
+        if self.reversed:
+            return CircularQueue.__reversed__(self)
+        return CircularQueue.__iter__(self)
+
+    def __reversed__(self) -> Iterator[T]:
+        """ Yields the elements from the deque's rear to its front, honouring reversed.
+        :complexity: O(1) per element, nothing is copied
+        """
+        if self.reversed:
+            return CircularQueue.__iter__(self)
+        return CircularQueue.__reversed__(self)
+
+    def clear(self) -> None:
+        """ Clears all elements from the deque.
+        :complexity: O(n) to let go of the elements
+        """
+        CircularQueue.clear(self)
+        self.array = ArrayR(len(self.array))
+        self.reversed = False
+
+
+class GrowableDeque(CircularDeque[T]):
+    """ CircularDeque that is never full, it doubles its array instead.
+
+    Starts with INITIAL_CAPACITY slots, so small deques stay small, and
+    copies every element once per doubling, so pushing is amortised O(1).
+    """
+    INITIAL_CAPACITY = 4
+
+    def __init__(self, initial_capacity: int = INITIAL_CAPACITY) -> None:
+        CircularDeque.__init__(self, initial_capacity)
+
+    def is_full(self) -> bool:
+        """ False, there is always room for one more element. """
+        return False
+
+    def push_rear(self, item: T) -> None:
+        """ Adds an element after the last element of the array.
+        :complexity: O(1) amortised, O(n) when the array has to grow
+        """
+        self.grow_if_needed()
+        CircularDeque.push_rear(self, item)
+
+    def push_front(self, item: T) -> None:
+        """ Adds an element before the first element of the array.
+        :complexity: O(1) amortised, O(n) when the array has to grow
+        """
+        self.grow_if_needed()
+        CircularDeque.push_front(self, item)
+
+    def grow_if_needed(self) -> None:
+        """ Doubles the array if every slot is used.
+        :complexity: O(n) when it grows, O(1) otherwise
+        """
+        if self.length < len(self.array):
+            return
+        self.resize(2 * len(self.array))
+
+    def resize(self, capacity: int) -> None:
+        """ Moves the elements into a new array of capacity slots, in the same
+        order from index 0, so front and reversed still hold.
+        :complexity: O(n), as one bulk copy when the elements do not wrap around
+        :pre: capacity >= len(self)
+        """
+        array = ArrayR(capacity)
+        end = self.front + self.length
+        if end <= len(self.array):
+            array[:self.length] = self.array[self.front:end]
+        else:
+            for i in range(self.length):
+                array[i] = self.array[(self.front + i) % len(self.array)]
+        self.array = array
+        self.front = 0
+        self.rear = self.length % capacity
+
+    def extend(self, items: list[T]) -> None:
+        """ Appends every item in order to the rear of the deque, honouring reversed,
+        growing the array at most once and copying the items in as one block.
+        :complexity: O(n + k) for k items
+        """
+        count = len(items)
+        if count == 0:
+            return
+        needed = self.length + count
+        capacity = len(self.array)
+        while capacity < needed:
+            capacity *= 2
+        if self.length > 0 or capacity != len(self.array):
+            self.resize(capacity)
+        else:
+            # empty and big enough, the items can go anywhere
+            self.front = self.rear = 0
+        if self.reversed:
+            # appending at the logical rear is pushing at the front of the array
+            self.front = capacity - count
+            self.array[self.front:capacity] = items[::-1]
+        else:
+            self.array[self.length:needed] = items
+            self.rear = needed % capacity
+        self.length = needed
+
+
+class TestDeque(unittest.TestCase):
+    """ Tests for the above class."""
+    CAPACITY = 5
+
+    def setUp(self):
+        self.deque = CircularDeque(self.CAPACITY)
+
+    def contents(self):
+        items = [self.deque[i] for i in range(len(self.deque))]
+        self.assertEqual(list(self.deque), items)
+        self.assertEqual(list(reversed(self.deque)), items[::-1])
+        return items
+
+    def test_append_and_serve(self):
+        for i in range(self.CAPACITY):
+            self.deque.append(i)
+        self.assertTrue(self.deque.is_full())
+        for i in range(self.CAPACITY):
+            self.assertEqual(self.deque.serve(), i)
+        self.assertTrue(self.deque.is_empty())
+
+    def test_both_ends(self):
+        self.deque.append(1)
+        self.deque.append_left(0)
+        self.deque.append(2)
+        self.assertEqual(self.contents(), [0, 1, 2])
+        self.assertEqual(self.deque.pop(), 2)
+        self.assertEqual(self.deque.serve(), 0)
+        self.assertEqual(self.contents(), [1])
+
+    def test_reverse(self):
+        for i in range(3):
+            self.deque.append(i)
+        self.deque.reverse()
+        self.assertEqual(self.contents(), [2, 1, 0])
+        self.deque.append(3)
+        self.assertEqual(self.contents(), [2, 1, 0, 3])
+        self.assertEqual(self.deque.serve(), 2)
+        self.deque.reverse()
+        self.assertEqual(self.contents(), [3, 0, 1])
+
+    def test_wrap_around(self):
+        expected = []
+        for i in range(self.CAPACITY):
+            self.deque.append(i)
+            expected.append(i)
+        for i in range(10):
+            self.assertEqual(self.deque.serve(), expected.pop(0))
+            self.deque.append(self.CAPACITY + i)
+            expected.append(self.CAPACITY + i)
+            self.deque.reverse()
+            expected.reverse()
+            self.assertEqual(self.contents(), expected)
+
+    def test_full_and_empty(self):
+        for i in range(self.CAPACITY):
+            self.deque.append_left(i)
+        self.assertRaises(Exception, self.deque.append, 0)
+        self.assertRaises(Exception, self.deque.append_left, 0)
+        self.deque.clear()
+        self.assertRaises(Exception, self.deque.serve)
+        self.assertRaises(Exception, self.deque.pop)
+
+    def test_drops_references(self):
+        for i in range(self.CAPACITY):
+            self.deque.append(i)
+        self.deque.serve()
+        self.deque.pop()
+        self.deque.reverse()
+        self.deque.serve()
+        self.assertEqual([slot for slot in self.deque.array if slot is not None], [1, 2])
+        self.deque.clear()
+        self.assertTrue(all(slot is None for slot in self.deque.array))
+
+class TestGrowableDeque(unittest.TestCase):
+    """ Tests for the growable deque."""
+
+    def test_grows(self):
+        deque = GrowableDeque()
+        self.assertEqual(len(deque.array), GrowableDeque.INITIAL_CAPACITY)
+        expected = []
+        for i in range(50):
+            if i % 3 == 0:
+                deque.append_left(i)
+                expected.insert(0, i)
+            else:
+                deque.append(i)
+                expected.append(i)
+            if i % 7 == 0:
+                deque.reverse()
+                expected.reverse()
+        self.assertFalse(deque.is_full())
+        self.assertEqual(list(deque), expected)
+        self.assertEqual(len(deque.array), 64)
+        while expected:
+            self.assertEqual(deque.serve(), expected.pop(0))
+
+    def test_extend(self):
+        for reverse in (False, True):
+            deque = GrowableDeque()
+            expected = []
+            for i in range(3):
+                deque.append(i)
+                expected.append(i)
+            if reverse:
+                deque.reverse()
+                expected.reverse()
+            deque.serve()
+            expected.pop(0)
+            deque.extend(list(range(10, 20)))
+            expected.extend(range(10, 20))
+            deque.extend([])
+            self.assertEqual(list(deque), expected)
+            deque.append(99)
+            deque.append_left(-1)
+            self.assertEqual(list(deque), [-1] + expected + [99])
+
+if __name__ == '__main__':
+    testtorun = TestDeque()
+    suite = unittest.TestLoader().loadTestsFromModule(testtorun)
+    unittest.TextTestRunner().run(suite)
@@ -8,7 +8,7 @@ __docformat__ = 'reStructuredText'
 
 import unittest
 from abc import ABC, abstractmethod
-from typing import Generic
+from typing import Generic, Iterator
 from data_structures.referential_array import ArrayR, T
 
 class Queue(ABC, Generic[T]):
@@ -93,6 +93,20 @@ class CircularQueue(Queue[T]):
         """ True if the queue is full and no element can be appended. """
         return len(self) == len(self.array)
 
+    def __iter__(self) -> Iterator[T]:
+        """ Yields the elements from front to rear, without serving them.
+        :complexity: O(1) per element, nothing is copied
+        """
+        for i in range(self.length):
+            yield self.array[(self.front + i) % len(self.array)]
+
+    def __reversed__(self) -> Iterator[T]:
+        """ Yields the elements from rear to front, without serving them.
+        :complexity: O(1) per element, nothing is copied
+        """
+        for i in range(self.length - 1, -1, -1):
+            yield self.array[(self.front + i) % len(self.array)]
+
     def clear(self) -> None:
         """ Clears all elements from the queue. """
         Queue.__init__(self)
@@ -178,6 +192,16 @@ class TestQueue(unittest.TestCase):
             for i in range(nitems):
                 self.assertEqual(queue.serve(), i)
 
+    def test_iter(self):
+        for queue, length in zip(self.queues, self.lengths):
+            self.assertEqual(list(queue), list(range(length)))
+            self.assertEqual(list(reversed(queue)), list(range(length))[::-1])
+            self.assertEqual(len(queue), length)
+        #iterating over a queue that wraps around the end of the array
+        for i in range(self.CAPACITY - 2):
+            self.large_queue.append(self.large_queue.serve())
+        self.assertEqual(list(self.large_queue), list(range(8, 10)) + list(range(8)))
+
     def test_clear(self):
         for queue in self.queues:
             queue.clear()
@@ -12,10 +12,21 @@ space to hold the references.
 Note that while I do check the precondition in __init__ (noone else
 would), I do not check that of getitem or setitem, since that is already
 checked by self.array[index].
+
+ArrayI is a sibling for arrays that only ever hold integers (layer indices,
+coordinates, ...). It stores them unboxed in an array.array, so it takes a
+few bytes per element instead of a reference plus an int object, and it is
+created zero-filled by a single C-level repetition.
+Both support reading and writing slices and moving a block of elements
+within the array, so callers can shift or copy elements in bulk instead of
+one at a time in a Python loop.
 """
+from __future__ import annotations
+
 __author__ = "Julian Garcia for the __init__ code, Maria Garcia de la Banda for the rest"
 __docformat__ = 'reStructuredText'
 
+from array import array
 from ctypes import py_object
 from typing import TypeVar, Generic
 
@@ -24,13 +35,14 @@ T = TypeVar('T')
 class ArrayR(Generic[T]):
     def __init__(self, length: int) -> None:
         """ Creates an array of references to objects of the given length
-        :complexity: O(length) for best/worst case to initialise to None
+        :complexity: O(length) for best/worst case to initialise to None,
+            done in C by one list repetition and one slice assignment
         :pre: length > 0
         """
         if length <= 0:
             raise ValueError("Array length should be larger than 0.")
         self.array = (length * py_object)() # initialises the space
-        self.array[:] =  [None for _ in range(length)]
+        self.array[:] = [None] * length
 
     def __len__(self) -> int:
         """ Returns the length of the array
@@ -38,16 +50,93 @@ class ArrayR(Generic[T]):
         """
         return len(self.array)
 
-    def __getitem__(self, index: int) -> T:
-        """ Returns the object in position index.
-        :complexity: O(1)
+    def __getitem__(self, index: int | slice) -> T | list[T]:
+        """ Returns the object in position index, or a list of the objects in a slice.
+        :complexity: O(1) for an index, O(k) for a slice of k elements
         :pre: index in between 0 and length - self.array[] checks it
         """
         return self.array[index]
 
-    def __setitem__(self, index: int, value: T) -> None:
-        """ Sets the object in position index to value
+    def __setitem__(self, index: int | slice, value: T | list[T]) -> None:
+        """ Sets the object in position index to value, or every object in a
+        slice to the matching element of value.
+        :complexity: O(1) for an index, O(k) for a slice of k elements
+        :pre: index in between 0 and length, and a slice and value have the
+            same length - self.array[] checks it
+        """
+        self.array[index] = value
+
+    def move(self, source: int, destination: int, count: int) -> None:
+        """ Copies the count elements starting at source to start at destination,
+        like memmove (the two blocks may overlap).
+        :complexity: O(count), as two slice copies
+        :pre: both blocks fit in the array
+        """
+        self.array[destination:destination + count] = self.array[source:source + count]
+
+
+class ArrayI:
+    """ Fixed length array of integers, stored unboxed in an array.array.
+
+    The typecode decides the size of each element, "q" (the default) being
+    a signed 64 bit integer, see the array module for the others.
+    """
+    def __init__(self, length: int, typecode: str = "q") -> None:
+        """ Creates an array of integers of the given length, all 0.
+        :complexity: O(length), done in C by one array repetition
+        :pre: length > 0
+        """
+        if length <= 0:
+            raise ValueError("Array length should be larger than 0.")
+        self.array = array(typecode, [0]) * length
+
+    def __len__(self) -> int:
+        """ Returns the length of the array
         :complexity: O(1)
+        """
+        return len(self.array)
+
+    def __eq__(self, other) -> bool:
+        """ Whether other is an ArrayI holding the same integers, whatever their typecodes.
+        :complexity: O(length), done in C
+        """
+        if not isinstance(other, ArrayI):
+            return NotImplemented
+        return self.array == other.array
+
+    # Mutable and compared by value.
+    __hash__ = None
+
+    def __getitem__(self, index: int | slice) -> int | array:
+        """ Returns the integer in position index, or an array.array copy of a slice.
+        :complexity: O(1) for an index, O(k) for a slice of k elements
         :pre: index in between 0 and length - self.array[] checks it
         """
+        return self.array[index]
+
+    def __setitem__(self, index: int | slice, value: int | array) -> None:
+        """ Sets the integer in position index to value, or every integer in a
+        slice to the matching element of value (an array.array of the same typecode).
+        :complexity: O(1) for an index, O(k) for a slice of k elements
+        :pre: index in between 0 and length - self.array[] checks it
+        :raises ValueError: if the slice and value have different lengths,
+            the length of the array never changes
+        """
+        if isinstance(index, slice):
+            if len(range(*index.indices(len(self.array)))) != len(value):
+                raise ValueError("Slice and value should have the same length.")
         self.array[index] = value
+
+    def move(self, source: int, destination: int, count: int) -> None:
+        """ Copies the count integers starting at source to start at destination,
+        like memmove (the two blocks may overlap).
+        :complexity: O(count), as two slice copies done in C
+        :pre: both blocks fit in the array
+        """
+        self.array[destination:destination + count] = self.array[source:source + count]
+
+    def fill(self, value: int = 0) -> None:
+        """ Sets every integer in the array to value.
+        :complexity: O(length), done in C
+        """
+        self.array[:] = array(self.array.typecode, [value]) * len(self.array)
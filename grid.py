@@ -1,5 +1,112 @@
 from __future__ import annotations
+from array import array
+from dataclasses import dataclass
+from functools import partial
+from itertools import accumulate
+from data_structures.referential_array import ArrayI
 from layer_store import SetLayerStore, AdditiveLayerStore , SequenceLayerStore
+from layer_util import apply_to_array
+
+try:
+    import numpy as np
+except ImportError:
+    # Without numpy, render falls back to one get_color per square.
+    np = None
+
+
+@dataclass
+class GridSnapshot:
+    """
+    The state of a grid at one point, from Grid.snapshot, kept in flat integer
+    arrays rather than as a Python object per square.
+    The first painted entries of squares are the painted squares (j * x + i)
+    in increasing order, and the same entries of states their layer stores'
+    snapshots. Additive stores snapshot to the layer indices of their layers,
+    so for an ADD grid those are all in layers, one byte each, one square after
+    the other, and states holds where each square's end.
+    """
+
+    draw_style: str
+    x: int
+    y: int
+    blank_special: bool
+    painted: int
+    squares: ArrayI
+    states: ArrayI
+    layers: bytes = b""
+
+    def square_states(self):
+        """
+        Yields (square, layer store snapshot) for every painted square.
+
+        Time complexity:
+        O(p * l) where p is the number of painted squares and l the most layers on one
+        """
+        squares = self.squares[:self.painted]
+        states = self.states[:self.painted]
+        if self.draw_style != Grid.DRAW_STYLE_ADD:
+            yield from zip(squares, states)
+            return
+        start = 0
+        for square, end in zip(squares, states):
+            yield square, self.layers[start:end]
+            start = end
+
+
+class BlankSquare:
+    """
+    Stand in for a square that has never been painted, so has no layer store.
+    It acts like an empty layer store, and only creates the real one (through
+    Grid.paint_square) once something actually has to be stored.
+    """
+
+    def __init__(self, grid: Grid, square: int) -> None:
+        self.grid = grid
+        self.square = square
+
+    def add(self, layer) -> bool:
+        if layer is None:
+            return False
+        return self.grid.paint_square(self.square).add(layer)
+
+    def erase(self, layer) -> bool:
+        # Nothing to erase.
+        return False
+
+    def special(self):
+        self.grid.paint_square(self.square).special()
+
+    def get_color(self, start, timestamp, x, y):
+        return start
+
+    def applied_layers(self) -> tuple:
+        return ()
+
+
+class GridColumn:
+    """
+    One column of the grid (every square with the same x).
+    Only a view, the squares themselves live in Grid.squares,
+    this is what lets grid[x][y] keep working.
+    """
+
+    def __init__(self, grid: Grid, x: int) -> None:
+        self.grid = grid
+        self.x = x
+
+    def __len__(self) -> int:
+        return self.grid.y
+
+    def __getitem__(self, y: int):
+        """Magic method to get the square at (self.x, y)"""
+        if y < 0:
+            y += self.grid.y
+        if not 0 <= y < self.grid.y:
+            raise IndexError("Grid index out of range")
+        square = y * self.grid.x + self.x
+        if square in self.grid.squares:
+            return self.grid.squares[square]
+        return BlankSquare(self.grid, square)
 
 
 class Grid:
@@ -12,6 +119,12 @@ class Grid:
         DRAW_STYLE_SEQUENCE
     )
 
+    LAYER_STORES = {
+        DRAW_STYLE_SET: SetLayerStore,
+        DRAW_STYLE_ADD: AdditiveLayerStore,
+        DRAW_STYLE_SEQUENCE: SequenceLayerStore,
+    }
+
     DEFAULT_BRUSH_SIZE = 2
     MAX_BRUSH = 5
     MIN_BRUSH = 0
@@ -28,35 +141,57 @@ class Grid:
         Should also intialise the brush size to the DEFAULT provided as a class variable.
 
         Doc:
-        The grid creates a list of list to store the layer values of the depending on
-        the draw_style chosen
+        The grid only keeps layer stores for squares that have been painted, in
+        a dictionary (self.squares) from square to store, square (i, j) being
+        j * x + i, the same order as the frame render produces.
+        self.grid only holds a GridColumn view per x, so that grid[x][y] still
+        gives the layer store of that square (or a BlankSquare if unpainted)
 
         Time complexity:
-        O(n^2) as n is the size of one of the side of the grid and it is repeated
-        2 times as for row x and y
+        O(n) where n is the size of one side of the grid, for the column views,
+        no layer store is made until its square is painted
 
         """
         # first we initialise the attributes of the grid with x,y,brush_size,drawstyle
         # and the grid
+        if draw_style not in Grid.DRAW_STYLE_OPTIONS:
+            raise ValueError(f"Invalid draw_style: {draw_style}")
         self.x = x
         self.y = y
         self.brush_size = Grid.DEFAULT_BRUSH_SIZE
         self.draw_style = draw_style
-        self.grid = []
-        for i in range(self.x):
-            row = []
-            for j in range(self.y):
-                if draw_style == Grid.DRAW_STYLE_SET:
-                    layer_store = SetLayerStore()
-                elif draw_style == Grid.DRAW_STYLE_ADD:
-                    layer_store = AdditiveLayerStore()
-                elif draw_style == Grid.DRAW_STYLE_SEQUENCE:
-                    layer_store = SequenceLayerStore()
-                else:
-                    raise ValueError(f"Invalid draw_style: {draw_style}")
-                row.append(layer_store)
-            self.grid.append(row)
+        self.squares = {}
+        # Whether unpainted squares have had an odd number of specials.
+        # A special on an empty store either toggles a flag (set) or does
+        # nothing (additive, sequence), so this is all a new store needs.
+        self.blank_special = False
+        self.grid = [GridColumn(self, i) for i in range(self.x)]
+
+        # render state, squares are stored as j * self.x + i (their frame position)
+        self.frame = None
+        self.frame_start = None
+        self.frame_version = 0
+        self.all_dirty = True
+        self.dirty_squares = set()
+        self.animated_squares = set()
+        self.animated_groups = None
+
+
+    def paint_square(self, square: int):
+        """
+        Returns the layer store of a square (j * x + i), making it first if the
+        square has never been painted.
 
+        Time complexity:
+        O(1)
+        """
+        if square not in self.squares:
+            layer_store = Grid.LAYER_STORES[self.draw_style]()
+            if self.blank_special:
+                layer_store.special()
+            layer_store.on_change = partial(self.mark_square_dirty, square)
+            self.squares[square] = layer_store
+        return self.squares[square]
 
     def increase_brush_size(self):
         """
@@ -94,24 +229,220 @@ class Grid:
         if self.brush_size > Grid.MIN_BRUSH:
             self.brush_size -= 1
 
-    def special(self):
+    def special(self) -> list:
         """
         Activate the special affect on all grid squares.
         .get_top_layer()
 
         Doc :
-        this code goes by x and y grid to apply the special if the layer is not none
+        this code goes through every painted square to apply the special, and
+        remembers it for the squares that are not painted yet.
+        a sequence special cannot be undone by another special, as it removes
+        the median layer, so it returns (x, y, layer) for every layer it removed
+        (an empty list for the other styles)
+
+        Time complexity:
+        O(p) where p is the number of painted squares
+        """
+        removed = []
+        for square, layer in self.squares.items():
+            erased = layer.special()
+            if erased is not None:
+                removed.append((square % self.x, square // self.x, erased))
+            self.dirty_squares.add(square)
+        self.blank_special = not self.blank_special
+        return removed
+
+    def snapshot(self) -> GridSnapshot:
+        """
+        Returns a compact copy of the state of every painted square,
+        which restore can later put back (see GridSnapshot): 8 bytes
+        per painted square, plus a byte per layer on an ADD grid.
+
+        Time complexity:
+        O(p * l + p log p) where p is the number of painted squares and l the most
+        layers on one, the squares being sorted so equal grids give equal snapshots
+        """
+        squares = sorted(self.squares)
+        painted = len(squares)
+        states = [self.squares[square].snapshot() for square in squares]
+        layers = b""
+        if self.draw_style == Grid.DRAW_STYLE_ADD:
+            layers = b"".join(states)
+            states = accumulate(len(state) for state in states)
+        # ArrayI cannot be empty, so a blank grid keeps one unused entry.
+        square_array = ArrayI(max(1, painted), "I" if self.x * self.y <= 2 ** 32 else "Q")
+        square_array[:painted] = array(square_array.array.typecode, squares)
+        state_array = ArrayI(max(1, painted), "I" if len(layers) < 2 ** 32 else "Q")
+        state_array[:painted] = array(state_array.array.typecode, states)
+        return GridSnapshot(
+            self.draw_style, self.x, self.y, self.blank_special, painted, square_array, state_array, layers,
+        )
+
+    def restore(self, snapshot: GridSnapshot) -> None:
+        """
+        Puts every square back in the state it was in when snapshot was taken,
+        squares painted since then becoming unpainted again.
+        The layer stores of squares painted in both are kept, and only restored
+        if their state changed, so restoring a snapshot close to the grid is cheap.
+        Raises ValueError if the snapshot is of a grid of another style or size.
+
+        Time complexity:
+        O(p * l) where p is the number of painted squares in the snapshot
+        and l the most layers on one
+        """
+        if (snapshot.draw_style, snapshot.x, snapshot.y) != (self.draw_style, self.x, self.y):
+            raise ValueError("Snapshot is of a different grid")
+        old_squares = self.squares
+        self.squares = {}
+        for square, state in snapshot.square_states():
+            layer_store = old_squares.get(square)
+            if layer_store is None:
+                layer_store = Grid.LAYER_STORES[self.draw_style]()
+                layer_store.restore(state)
+                layer_store.on_change = partial(self.mark_square_dirty, square)
+            elif layer_store.snapshot() != state:
+                layer_store.restore(state)
+            self.squares[square] = layer_store
+        self.blank_special = snapshot.blank_special
+        # Squares may have become unpainted, so the whole frame is redrawn.
+        self.frame = None
+        self.mark_all_dirty()
+
+    def mark_dirty(self, x, y):
+        """
+        Flag grid[x][y] as changed, so the next render recomputes its colour.
+        The layer stores of the grid already do this whenever their layers change
+        (through LayerStore.on_change), so grid[x][y].add and the like need nothing more.
+
+        Time complexity:
+        O(1)
+        """
+        self.dirty_squares.add(y * self.x + x)
+
+    def mark_square_dirty(self, square: int):
+        """
+        mark_dirty for a square numbered j * x + i.
+
+        Time complexity:
+        O(1)
+        """
+        self.dirty_squares.add(square)
+
+    def mark_all_dirty(self):
+        """
+        Flag every painted square as changed.
+
+        Time complexity:
+        O(1)
+        """
+        self.all_dirty = True
+        self.dirty_squares.clear()
+
+    def render(self, timestamp, start=(255, 255, 255)) -> memoryview:
+        """
+        Render the whole grid into a single frame buffer.
+        - timestamp: The timestamp passed on to every layer.
+        - start: The colour underneath all layers (the canvas background).
+
+        Returns a HxWx3 uint8 buffer, H being self.y and W being self.x,
+        so that frame[y, x, c] holds channel c of the colour of grid[x][y].
+        The same buffer is kept and updated in place by later renders.
+
+        Doc:
+        instead of the window asking every square for its colour and drawing
+        them one rectangle at a time, the colours are written into one flat
+        bytearray (row by row, 3 bytes per square) which the caller can upload
+        in one go as an image / texture.
+        The frame is kept between renders, and only the squares marked dirty
+        since the last render plus the squares holding an animated layer are
+        recomputed (animated meaning a layer marked time_dependent), everything
+        else keeps its colour from the last frame.
+        frame_version goes up whenever any square was redrawn.
+        With numpy, the squares to redraw are grouped by their applied layers
+        and each layer is applied to the whole group at once with its array
+        kernel, so the per square python work is only finding the group.
+
+        Time complexity:
+        O(d + a) where d is the number of dirty squares and a the number of
+        animated squares, O(p) for the first render where p is the number
+        of painted squares.
+        With numpy, only O(groups * layers) calls into the layers.
+        """
+        start = tuple(start)
+        if self.frame is None or start != self.frame_start:
+            # Unpainted squares are never drawn, they keep the start colour.
+            self.frame = bytearray(bytes(start) * (self.x * self.y))
+            self.frame_start = start
+            self.mark_all_dirty()
+
+        if self.all_dirty:
+            self.animated_squares.clear()
+            dirty = list(self.squares)
+        else:
+            dirty = self.dirty_squares
+        for square in dirty:
+            layers = self.square_layers(square)
+            if any(layer.time_dependent for layer in layers):
+                self.animated_squares.add(square)
+            else:
+                self.animated_squares.discard(square)
+        if dirty:
+            self.animated_groups = None
+        redraw = [square for square in dirty if square not in self.animated_squares]
+        redraw_animated = bool(self.animated_squares)
+        self.all_dirty = False
+        self.dirty_squares = set()
+
+        if not redraw and not redraw_animated:
+            return memoryview(self.frame).cast("B", (self.y, self.x, 3))
+        self.frame_version += 1
+
+        if np is None:
+            for square in redraw + list(self.animated_squares):
+                i, j = square % self.x, square // self.x
+                self.frame[square * 3:square * 3 + 3] = bytes(self[i][j].get_color(start, timestamp, i, j))
+            return memoryview(self.frame).cast("B", (self.y, self.x, 3))
+
+        if self.animated_groups is None:
+            self.animated_groups = self.group_squares(self.animated_squares)
+        pixels = np.frombuffer(self.frame, dtype=np.uint8).reshape(self.y, self.x, 3)
+        for layers, xs, ys in self.group_squares(redraw) + self.animated_groups:
+            colors = np.empty((len(xs), 3), dtype=np.int64)
+            colors[:] = start
+            for layer in layers:
+                colors = apply_to_array(layer, colors, timestamp, xs, ys)
+            pixels[ys, xs] = colors
+        return memoryview(self.frame).cast("B", (self.y, self.x, 3))
+
+    def group_squares(self, squares) -> list:
+        """
+        Group squares (stored as j * self.x + i) by their applied layers.
+        Returns a list of (layers, xs, ys), xs and ys being numpy arrays of the
+        positions of every square in the group.
 
         Time complexity:
-        O(N^2) same as the grid it covers grid x and y and therefore it performs
-        twice in given two rows
+        O(n * m) where n is the number of squares and m the most layers on one
         """
-        for i in range(self.x):
-            for j in range(self.y):
-                layer = self.grid[i][j]
-                if layer is not None:
-                    layer.special()
+        groups = {}
+        for square in squares:
+            i, j = square % self.x, square // self.x
+            layers = self.square_layers(square)
+            key = tuple(layer.index for layer in layers)
+            if key not in groups:
+                groups[key] = (layers, [], [])
+            groups[key][1].append(i)
+            groups[key][2].append(j)
+        return [
+            (layers, np.array(xs, dtype=np.int64), np.array(ys, dtype=np.int64))
+            for layers, xs, ys in groups.values()
+        ]
 
+    def square_layers(self, square: int) -> tuple:
+        """The applied layers of a square (j * x + i), nothing if it is unpainted."""
+        if square in self.squares:
+            return self.squares[square].applied_layers()
+        return ()
 
     def __getitem__(self, index):
         """Magic method to get the grid index """
@@ -0,0 +1,135 @@
+"""
+Grid keyframes.
+Used by the undo and replay trackers to jump to a point in their history by
+restoring the nearest earlier snapshot of the grid, and applying only the
+actions after it, instead of every action from where the grid is now.
+"""
+from __future__ import annotations
+
+from bisect import bisect_right, bisect_left
+from grid import Grid, GridSnapshot
+
+
+class Keyframes:
+    """
+    Snapshots of a grid, keyed by position in a history of actions
+    (the snapshot at position p being the grid after the first p actions).
+
+    record is called after each action, and takes a snapshot once
+    every_actions actions or every_cells touched squares have gone by
+    since the last one, so jumping anywhere costs at most about that many
+    actions on top of the restore.
+    """
+
+    DEFAULT_EVERY_ACTIONS = 50
+    DEFAULT_EVERY_CELLS = 20000
+
+    def __init__(self, every_actions: int = DEFAULT_EVERY_ACTIONS, every_cells: int = DEFAULT_EVERY_CELLS) -> None:
+        self.every_actions = every_actions
+        self.every_cells = every_cells
+        self.positions = []
+        self.snapshots = {}
+        self.actions_since = 0
+        self.cells_since = 0
+        # Every action and square recorded, for the average size of an action.
+        self.actions_recorded = 0
+        self.cells_recorded = 0
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def record(self, position: int, grid: Grid, cells: int, actions: int = 1) -> None:
+        """
+        Note that actions (one by default) touching cells squares brought grid
+        to position, and snapshot it if enough has changed since the last keyframe.
+
+        Time complexity:
+        O(1), plus Grid.snapshot when a keyframe is taken
+        """
+        self.actions_since += actions
+        self.cells_since += cells
+        self.actions_recorded += actions
+        self.cells_recorded += cells
+        if self.actions_since >= self.every_actions or self.cells_since >= self.every_cells:
+            self.add(position, grid)
+
+    def actions_until_due(self) -> int:
+        """
+        How many more actions can be recorded before a keyframe is due on the action count,
+        so batches of actions can stop there to be snapshot (at least 1).
+
+        Time complexity:
+        O(1)
+        """
+        return max(1, self.every_actions - self.actions_since)
+
+    def add(self, position: int, grid: Grid) -> None:
+        """
+        Snapshot grid as the state at position, replacing any keyframe there.
+
+        Time complexity:
+        O(k) for k keyframes, plus Grid.snapshot
+        """
+        if position not in self.snapshots:
+            self.positions.insert(bisect_left(self.positions, position), position)
+        self.snapshots[position] = grid.snapshot()
+        self.actions_since = 0
+        self.cells_since = 0
+
+    def nearest(self, position: int) -> int | None:
+        """
+        The position of the last keyframe at or before position, None if there is none.
+
+        Time complexity:
+        O(log k) for k keyframes
+        """
+        index = bisect_right(self.positions, position)
+        if index == 0:
+            return None
+        return self.positions[index - 1]
+
+    def restore_cost(self, position: int) -> float:
+        """
+        Roughly how many actions restoring the keyframe at position costs as much as,
+        since restoring goes through every painted square of the snapshot.
+
+        Time complexity:
+        O(1)
+        """
+        cells_per_action = self.cells_recorded / max(1, self.actions_recorded)
+        return self.snapshots[position].painted / max(1.0, cells_per_action)
+
+    def snapshot(self, position: int) -> GridSnapshot:
+        """The snapshot taken at position."""
+        return self.snapshots[position]
+
+    def drop_after(self, position: int) -> None:
+        """
+        Forget every keyframe after position, for when the history after it is replaced.
+
+        Time complexity:
+        O(d) for d dropped keyframes
+        """
+        while self.positions and self.positions[-1] > position:
+            del self.snapshots[self.positions.pop()]
+
+    def drop_before(self, position: int) -> None:
+        """
+        Forget every keyframe before position, for when the history before it is evicted.
+
+        Time complexity:
+        O(k) for k keyframes
+        """
+        index = bisect_left(self.positions, position)
+        for dropped in self.positions[:index]:
+            del self.snapshots[dropped]
+        del self.positions[:index]
+
+    def clear(self) -> None:
+        """Forget every keyframe."""
+        self.positions = []
+        self.snapshots = {}
+        self.actions_since = 0
+        self.cells_since = 0
+        self.actions_recorded = 0
+        self.cells_recorded = 0
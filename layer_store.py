@@ -1,19 +1,69 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
+from functools import wraps
 
 import layer_util
-from data_structures.stack_adt import ArrayStack
-from data_structures.queue_adt import CircularQueue
-from data_structures.array_sorted_list import ArraySortedList
-from data_structures.sorted_list_adt import ListItem
+from data_structures.deque_adt import GrowableDeque
+from data_structures.bset import BSet
 from layer_util import Layer
+from layers import invert
+
+
+def memoized_color(get_color):
+    """
+    Decorator for LayerStore.get_color.
+    While none of the store's layers are time dependent, the colour only
+    depends on (start, x, y), so it is remembered in store.memo and reused
+    until the store calls forget_colors (on add, erase and special).
+    """
+    @wraps(get_color)
+    def memo_get_color(self, start, timestamp, x, y):
+        if self.memo is None:
+            time_dependent = any(layer.time_dependent for layer in self.applied_layers())
+            self.memo = False if time_dependent else {}
+        if self.memo is False:
+            return get_color(self, start, timestamp, x, y)
+        key = (tuple(start), x, y)
+        if key not in self.memo:
+            self.memo[key] = get_color(self, start, timestamp, x, y)
+        return self.memo[key]
+    return memo_get_color
+
+
+def select_bit(bits: int, k: int) -> int:
+    """
+    Position of the k-th (from 0) lowest set bit of bits, which must have more than k set.
+    Binary searches for the shortest prefix of bits with k + 1 bits set, so O(log w)
+    for w the bit length of bits.
+    """
+    low, high = 0, bits.bit_length() - 1
+    while low < high:
+        mid = (low + high) // 2
+        if (bits & ((2 << mid) - 1)).bit_count() > k:
+            high = mid
+        else:
+            low = mid + 1
+    return low
 
 
 class LayerStore(ABC):
 
 
     def __init__(self) -> None:
-        pass
+        # Remembered colours, see memoized_color.
+        # None until worked out, False while a layer is time dependent.
+        self.memo = None
+        # Called with no arguments whenever the layers change, if set.
+        # The grid holding the store uses it to mark its square dirty.
+        self.on_change = None
+
+    def forget_colors(self) -> None:
+        """
+        Forget every remembered colour, called whenever the layers change.
+        """
+        self.memo = None
+        if self.on_change is not None:
+            self.on_change()
 
     @abstractmethod
     def add(self, layer: Layer) -> bool:
@@ -45,6 +95,28 @@ class LayerStore(ABC):
         """
         pass
 
+    @abstractmethod
+    def applied_layers(self) -> tuple[Layer, ...]:
+        """
+        Returns the layers get_color applies to `start`, in the order they are applied.
+        """
+        pass
+
+    @abstractmethod
+    def snapshot(self):
+        """
+        Returns a compact, immutable copy of the store's state (built from ints),
+        which restore can put back into any store of the same type.
+        """
+        pass
+
+    @abstractmethod
+    def restore(self, state) -> None:
+        """
+        Puts the store in the state returned by snapshot.
+        """
+        pass
+
 
 
 
@@ -88,6 +160,7 @@ class SetLayerStore(LayerStore):
         """
         if layer is not self.layer:
             self.layer = layer
+            self.forget_colors()
             return True
         return False
 
@@ -111,6 +184,7 @@ class SetLayerStore(LayerStore):
 
         if layer is not self.layer:
             self.layer = None
+            self.forget_colors()
             return True
         return False
 
@@ -125,9 +199,52 @@ class SetLayerStore(LayerStore):
 
        """
        self.special_mode = not self.special_mode
+       self.forget_colors()
 
+    def applied_layers(self) -> tuple[Layer, ...]:
+        """
+        Doc:
+        the stored layer, followed by an invert when special mode is on
+        (as get_color inverts the layer's colour). nothing at all if there
+        is no layer
+
+        Time complexity:
+        O(1)
+        """
+        if self.layer is None:
+            return ()
+        if self.special_mode:
+            return (self.layer, invert)
+        return (self.layer,)
+
+    def snapshot(self) -> int:
+        """
+        Doc:
+        packs the state into one int, the lowest bit being special mode and
+        the rest the layer index + 1 (0 for no layer)
+
+        Time complexity:
+        O(1)
+        """
+        layer_number = 0 if self.layer is None else self.layer.index + 1
+        return layer_number * 2 + self.special_mode
+
+    def restore(self, state: int) -> None:
+        """
+        Doc:
+        unpacks an int from snapshot back into the layer and special mode
+
+        Time complexity:
+        O(1)
+        """
+        layer_number, special = divmod(state, 2)
+        self.layer = None if layer_number == 0 else layer_util.LAYERS[layer_number - 1]
+        self.special_mode = bool(special)
+        self.forget_colors()
 
 
+
+    @memoized_color
     def get_color(self, start: tuple[int, int, int], timestamp: int, x: int, y: int) -> tuple[int, int, int]:
         """
         Returns the colour this square should show, given the current layers.
@@ -170,16 +287,14 @@ class AdditiveLayerStore(LayerStore):
      def __init__(self) -> None:
          """
          Doc:
-         Set the Queue and the Stack inside the self.layer_list and self.stack_
-         layer_list with a max capacity of 100. also initialising the self.color and 0,0,0
-         and special mode as false
+         Set the Deque inside the self.layer_list, it starts with 4 slots and
+         doubles whenever it fills, so there is no limit on the number of layers.
+         also initialising the self.color as 0,0,0
 
          """
          super().__init__()
-         self.special_mode = False
          self.color = (0,0,0)
-         self.layer_list = CircularQueue(max_capacity=100)
-         self.stack_layer_list = ArrayStack(max_capacity=100)
+         self.layer_list = GrowableDeque()
 
 
      def add(self,layer: Layer):
@@ -197,6 +312,7 @@ class AdditiveLayerStore(LayerStore):
          if layer == None:
              return False
          self.layer_list.append(layer)
+         self.forget_colors()
          return True
 
      def erase(self,layer: Layer):
@@ -212,94 +328,80 @@ class AdditiveLayerStore(LayerStore):
          if self.layer_list.is_empty():
              return False
          self.layer_list.serve()
+         self.forget_colors()
          return True
 
      def special(self):
          """
          Doc:
-         Create the temperorary Queue and Stack to store the layer value
-         What this special does is that it will reverse the order of the queue
-         by using the queue to take the last element in the list (also the first to entered)
-         and put it into a stack and then take the latest element to put it back into the queue
-         with this id will reverse the order as first element in become the last to take inside the stack
+         What this special does is reverse the order of the layers. the deque
+         keeps a reversed flag, so instead of moving every layer through a
+         temporary stack and queue it only flips which end is the front,
+         append and serve then work on the other ends from now on
 
          Time complexity:
-         O(n) as the code takes the queue elements and serve them and then it
-         pushes them back into a stack
+         O(1) flipping a flag
          """
-         temp_q = CircularQueue(max_capacity=100)
-         temp_stack = ArrayStack(max_capacity=100)
-         while not self.layer_list.is_empty():
-             temp_stack.push(self.layer_list.serve())
-         while not temp_stack.is_empty():
-             temp_q.append(temp_stack.pop())
-             self.layer_list.append(temp_q.serve())
-
-
-
+         self.layer_list.reverse()
+         self.forget_colors()
 
-     def get_color(self, start: tuple[int, int, int], timestamp: int, x: int, y: int) -> tuple[int, int, int]:
+     def applied_layers(self) -> tuple[Layer, ...]:
          """
          Doc:
-         First it identify itself as self.color is the start value and if
-         there isnt a layer it will return the start value tuple . if the
-         queue list(self.layer_list) is not empty it again create a new temporary
-         list of the queue to store it for a while and it will go through another
-         loop of while not as this while loop what it does is grabs all of the layer one
-         by one by serving(grab end element) it and store it to layer_serve and add it
-         to the temporary queue . The reason why i put into temporary queue is that
-         since serve removes the layer in the queue and return it i need the queue to
-         store the layers and not lose it when the serve is called to use.apply
-          to call the layer function in the layer_util.py and layer.py. so to prevent this i
-         create the temporary queue save the serve layers and once it is done with using
-         the serve layers the queue will refilled with the temporary queue layers which are
-         the same as before and then it will return the color tuple of that served layer.
-         If it is special , what this does is that it will use the special queue where
-         all of the layers are reverse and do the same . it will create a temporary queue special
-         store the layers into temporary queue before serving the original queue which is
-         self.layer_list to use the .apply function .so when it is done it will refill the
-         original queue back to where it was with al the layers so that the next input
-         can use the same ordered layers in the queue
-
-
-         Time comeplexity:
-         O(n^2) where n is the self.layer_list this is because there seems to be two while loops running
-         where the while loop iterates thorugh the queue twice to store it into
-         the temporary queue one for original and one for special
-
+         reads the deque from front to rear without serving anything, which
+         is the order get_color applies them in
 
+         Time complexity:
+         O(n) where n is the length of self.layer_list
          """
+         return tuple(self.layer_list)
 
+     def snapshot(self) -> bytes:
+         """
+         Doc:
+         the index of every layer, from the front of the deque to the rear,
+         one byte each
 
-         self.color = start
-         if self.layer_list.is_empty():
-             return self.color
-         if not self.layer_list.is_empty():
-             temporary_q = CircularQueue(max_capacity = 100)
-             while not self.layer_list.is_empty():
-                 layer_serve = self.layer_list.serve()
-                 if layer_serve == None:
-                     return
-                 temporary_q.append(layer_serve)
-                 self.color = layer_serve.apply(self.color, timestamp, x, y)
-                 if self.special_mode:
-                     self.color = start
-                     while not self.layer_list.special().is_empty():
-                         temporary_q_special = CircularQueue(max_capacity=100)
-                         layer_serve_special = self.layer_list.special().serve()
-                         temporary_q_special.append(layer_serve_special)
-                         self.color = layer_serve_special.apply(self.color, timestamp, x, y)
-                     self.layer_list = temporary_q_special
-                     return self.color
-             self.layer_list = temporary_q
-             return self.color
+         Time complexity:
+         O(n) where n is the length of self.layer_list
+         """
+         return bytes(layer.index for layer in self.layer_list)
 
+     def restore(self, state: bytes) -> None:
+         """
+         Doc:
+         refills the deque with the layers of a snapshot, in the same order.
+         an empty deque (as a new store has) is filled as it is, growing at most once
 
+         Time complexity:
+         O(n) where n is the number of layers in the snapshot
+         """
+         if len(self.layer_list) > 0:
+             self.layer_list.clear()
+         self.layer_list.extend([layer_util.LAYERS[index] for index in state])
+         self.forget_colors()
 
 
 
 
+     @memoized_color
+     def get_color(self, start: tuple[int, int, int], timestamp: int, x: int, y: int) -> tuple[int, int, int]:
+         """
+         Doc:
+         First it identify itself as self.color is the start value and if
+         there isnt a layer it will return the start value tuple. otherwise
+         it iterates over the deque from front to rear (which honours the
+         reversed flag from special) and applies every layer in turn. iterating
+         does not serve anything, so no temporary queue is needed and the
+         layers never move
 
+         Time comeplexity:
+         O(n) where n is the length of self.layer_list
+         """
+         self.color = start
+         for layer in self.layer_list:
+             self.color = layer.apply(self.color, timestamp, x, y)
+         return self.color
 
 
 
@@ -313,187 +415,158 @@ class SequenceLayerStore(LayerStore):
         In the event of two layers being the median names, pick the lexicographically smaller one.
 
     Doc :
-    for this part of the layer_store.py there is a use of the arraysorted list
-    so two sorted list is made one is normal and one is for special and as usual
-    there will be self.color = default 0,0,0
-
+    for this part of the layer_store.py the applied layers are kept in a bit vector
+    set (BSet), layer index i being the element i + 1 (BSet elements start at 1).
+    so checking, adding and removing a layer is a single bit operation, and the
+    bits in increasing order are the layers in the order they are applied.
+    a second bit vector (self.name_bits) holds the same layers by name rank
+    (see layer_util.NAME_ORDER), which is what special needs to find the median.
+    as usual there will be self.color = default 0,0,0
 
     """
 
     def __init__(self) -> None:
         """
         Doc:
-        set the array sorted list to the list names self.layer_list and
-        self.layer_list_special
+        set the bit vector set of applied layers to self.layer_set
         """
         super().__init__()
-        self.layer_list = ArraySortedList(max_capacity=100)
-        self.layer_list_special = ArraySortedList(max_capacity=100)
+        self.layer_set = BSet()
+        # The same layers by name: bit r is set when the layer with
+        # name_rank r is applied, kept for special's median lookup.
+        self.name_bits = 0
+        self.name_version = layer_util.name_order_version
         self.color = (0,0,0)
 
-
-
-
-
-
-
-    def add(self, layer: Layer):
+    def add(self, layer: Layer) -> bool:
         """
         Doc:
-        For this add , if the layer is none it will return none but when layer
-        is not none if will go though a sorted array list and use the add function
-        to add the layer at a certain position using its name and index specify
-        in the layer_util and layer.py file into the arraysortedlist class . With
-        that , if the layer added is the same as the layer that is already added it will
-        return none also which means do nothing
+        For this add , if the layer is none or already applied it will return false,
+        otherwise the bit of the layer index is set and it returns true
 
         Time complexity:
-        O(n) as it goes through a loop once for the self,layer_list
+        O(1) a single bit operation
         """
-        if layer == None:
-            return
-        for layer_add in self.layer_list:
-            if layer_add is None:
-                self.layer_list.add(ListItem(layer.name, layer.index))
-                break
-
-            if layer_add.value == layer.name and layer_add.key == layer.index:
-                return
+        if layer is None or (layer.index + 1) in self.layer_set:
+            return False
+        self.layer_set.add(layer.index + 1)
+        self.sync_name_bits()
+        self.name_bits |= 1 << layer.name_rank
+        self.forget_colors()
+        return True
 
-
-    def erase(self, layer: Layer):
+    def erase(self, layer: Layer) -> bool:
         """
         Doc:
-        For the erase function what this does is that it goes through the array sorted
-        list(self.layer_list ) and check for any none values as i come up with this
-        error when debugging this as the layer.name and index wont work it is None.
-        so to make up for this if it is none it will do nothing .but if the value (name )
-        and the key(index) is the same it will use the function from the arraysorted class
-        delete at index to remove the layer in the self.layer_list arraysorted list
-        and after that it will resize the arraysorted list as a layer is remove from the
-        sorted list it needs to fill in that gap with none so it resizes it to avoid
-        an error of array list
+        For the erase function, if the layer is applied its bit is cleared and it
+        returns true, otherwise nothing changes and it returns false
 
         Time complexity:
-        O(n) as it goes through a loop once for the self,layer_list
-
-
-
+        O(1) a single bit operation
         """
-        for i in range(len(self.layer_list)):
-            if self.layer_list[i] is None:
-                break
-            if self.layer_list[i].value == layer.name and self.layer_list[i].key == layer.index:
-                self.layer_list.delete_at_index(i)
-                self.layer_list._resize()
-                break
-
+        if layer is None or (layer.index + 1) not in self.layer_set:
+            return False
+        self.layer_set.remove(layer.index + 1)
+        self.sync_name_bits()
+        self.name_bits &= ~(1 << layer.name_rank)
+        self.forget_colors()
+        return True
 
     def special(self):
         """
         Doc:
         For this special it will be called from the user then it will activate straight away.
-        For this i decided to set the length of list (arraysortedlist) to apply-lauers
-        as for this part of the seqlayerstore it is needed to take the median of the lexicographycal order layer
-        and remove it . so to do this i split to two if statements one is even and
-        the other is for odd lenght of layers in the list . For the even it will first take
-        median layer index of the list and store it to median index and then i grab
-        the listitem in the sorted array list and store it into a temporary list and
-        then i use the sort function to sort the layers listitem value(name) by its
-        lexicographycal order and store it into sort_layer_name. after that it will go through
-        a for loop in the self.layer_listto check if the j (layer listitem) is not a
-        none value and the j value(name of layer listitem) is the same as the sort_layer_list
-        lexicographical ordered median of the layer and remove it from the sortedarraylist
-        after that it will resize to avoid error . Same goes to the odd length layers
-        it will do the same but this time its for the median layer and there isnt need
-        for a comparison of the median layer and the formula can go like this apply_layers // 2
-        and after that it will remove the median layer in lexicographycal order and resize
-        the sorted array list
+        the applied layers are already kept in name order in self.name_bits, so the
+        median is the k-th set bit, k being (n // 2) - 1 with an even number of layers
+        (the lexicographically smaller of the two medians) and n // 2 with an odd number.
+        that bit is found by binary search on how many bits are set below a position.
+        the layer removed is returned (none if there were no layers), as adding it
+        back is the only way to undo the special
 
         Time complexity:
-        O(n log n) as n is the length of the layer_list for the even layers part
-        the  temp_layer_list that only includes the non-None elements of layer_list,
-        which takes O(n) time, where n is the length of layer_list. It sorts temp_layer_list
-        using the sorted() function with a key function that extracts the value attribute of each
-        layer, which takes O(n log n) time and lastly the check for value in self.layer_list
-        takes O(n) times and the total for the first part is O(n log n) . the same goes to
-        the odd length layers
+        O(log n) where n is the number of layers that can be registered
+        """
+        self.sync_name_bits()
+        applied = self.name_bits.bit_count()
+        if applied == 0:
+            return None
+        if applied % 2 == 0:
+            median_index = (applied // 2) - 1
+        else:
+            median_index = applied // 2
+        median = layer_util.NAME_ORDER[select_bit(self.name_bits, median_index)]
+        self.erase(median)
+        return median
 
+    def sync_name_bits(self) -> None:
         """
+        Doc:
+        rebuilds self.name_bits from the applied layers if a layer has been registered
+        since they were set, as that can change every name rank.
 
+        Time complexity:
+        O(1), O(n) on the first call after a registration
+        """
+        if self.name_version == layer_util.name_order_version:
+            return
+        self.name_bits = 0
+        for layer in self.applied_layers():
+            self.name_bits |= 1 << layer.name_rank
+        self.name_version = layer_util.name_order_version
 
+    def applied_layers(self) -> tuple[Layer, ...]:
+        """
+        Doc:
+        walks the set bits from lowest to highest, so in order of index, and looks
+        up each layer by its index in layer_util.LAYERS
 
-        apply_layers = len(self.layer_list)
+        Time complexity:
+        O(n) where n is the number of applied layers
+        """
+        layers = []
+        elems = self.layer_set.elems
+        while elems:
+            lowest = elems & -elems
+            layers.append(layer_util.LAYERS[lowest.bit_length() - 1])
+            elems ^= lowest
+        return tuple(layers)
+
+    def snapshot(self) -> int:
+        """
+        Doc:
+        the bits of the bit vector set, which are the whole state
 
-        #for even length layers
-        if apply_layers % 2 == 0:
-            median_index = (apply_layers // 2) - 1
-            temp_layer_list = [x for x in self.layer_list if x is not None]
-            sort_layer_name = sorted(temp_layer_list, key=lambda x: x.value)
-            for j in self.layer_list:
-                if j is not None and j.value == sort_layer_name[median_index].value:
-                    self.layer_list.remove(j)
-                    self.layer_list._resize()
-                    break
+        Time complexity:
+        O(1)
+        """
+        return self.layer_set.elems
 
-        #for odd length layers
-        else:
-            median_index = apply_layers // 2
-            temp_layer_list = [x for x in self.layer_list if x is not None]
-            sort_layer_name = sorted(temp_layer_list, key=lambda x: x.value)
-            for j in self.layer_list:
-                if j is not None and j.value == sort_layer_name[median_index].value:
-                    self.layer_list.remove(j)
-                    self.layer_list._resize()
-                    break
+    def restore(self, state: int) -> None:
+        """
+        Doc:
+        sets the bits of the bit vector set, the name ordered bits are rebuilt
+        from them the next time they are needed
 
+        Time complexity:
+        O(1)
+        """
+        self.layer_set.elems = state
+        self.name_version = None
+        self.forget_colors()
 
+    @memoized_color
     def get_color(self, start: tuple[int, int, int], timestamp: int, x: int, y: int) -> tuple[int, int, int]:
         """
         Doc:
-        For this get_color function , this will be a simple one as the special this
-        time doesnt need to be activate via true or false as the special can be activate
-        on its own by the user . so for this code it will check if the list is empty, if its
-        empty then it will return the start value and if it isnt it will check if the
-        first layer in the list is none if it is break and if is not continue to having the
-        name_layer to be the listitem value which is the name of the layer in string form ,
-        after that it wil go through the layer_util class layers to access all of the layers
-        function to allow the function name to access the .apply function as the .apply
-        function doesnt work when it is a string . so by checking the string of the listitem
-        by its value (name) it will check if its the same . if its the same it will use the laye
-        function name in layer_util.LAyers to call the function like the other get_color
-        functions and at the end it will update the start value fro the next cycle and break
-        the loop of checking for the layer in layer_util.LAYERS and repeat the loop
-        of iterating the self.layer_list array sorted list . lastly it will return the color
+        applies every applied layer to the colour, in order of index, starting from
+        the start value. if no layer is applied it returns the start value
 
         Time complexity:
-        O(nm) where n is the length of the layer_list and m is the number of layers in the
-        layer_util module.If the layer_list is not empty, the code enters a for loop that
-        iterates over the elements of the layer_list. The loop runs n times, where n is the
-        length of the layer_list, so the time complexity of this loop is O(n).
-        Inside the loop, the code extracts the name of the layer from the value attribute
-        of the layer_sort object, which takes O(1) time.The code then enters another for
-        loop that iterates over the layers in the layer_util module. The loop runs m times,
-         where m is the number of layers in the module, so the time complexity of this loop is O(m).
-         Therefore the time complexity is O(nm)
-
+        O(n) where n is the number of applied layers
         """
-
-
-        if self.layer_list.is_empty():
+        if self.layer_set.is_empty():
             return start
-        for layer_sort in self.layer_list:
-            if layer_sort is None:
-                break
-            name_layer = layer_sort.value
-            for layer in layer_util.LAYERS:
-                if layer.name == name_layer:
-                     self.color = layer.apply(start, timestamp, x, y)
-                     start = self.color
-                     break
+        self.color = start
+        for layer in self.applied_layers():
+            self.color = layer.apply(self.color, timestamp, x, y)
         return self.color
-
-
-
-
-
@@ -8,8 +8,18 @@ from __future__ import annotations
 from dataclasses import dataclass, field
 from data_structures.referential_array import ArrayR
 
+try:
+    import numpy as np
+except ImportError:
+    # numpy only speeds up applying layers to many squares at once.
+    np = None
+
 LAYERS: ArrayR[Layer] = ArrayR(20)
 cur_layer_index = 0
+# The registered layers sorted by name, so NAME_ORDER[layer.name_rank] is layer.
+NAME_ORDER: ArrayR[Layer] = ArrayR(20)
+# Goes up whenever registering a layer changes the name ranks.
+name_order_version = 0
 
 @dataclass
 class Layer:
@@ -18,10 +28,17 @@ class Layer:
     apply: function
     name: str = field(init=False)
     bg: tuple[int, int, int] | None = None
+    apply_array: function | None = field(default=None, init=False)
+    time_dependent: bool = field(default=False, init=False)
+    name_rank: int = field(default=0, init=False)
 
     def __post_init__(self):
         if hasattr(self.apply, "__bg__"):
             self.bg = self.apply.__bg__
+        if hasattr(self.apply, "__time_dependent__"):
+            self.time_dependent = self.apply.__time_dependent__
+        if hasattr(self.apply, "__apply_array__"):
+            self.apply_array = self.apply.__apply_array__
         self.name = self.apply.__name__
 
 class background(object):
@@ -43,6 +60,63 @@ class background(object):
         func.__bg__ = self.val
         return layer
 
+def time_dependent(layer: function|Layer):
+    """Simple decorator to mark a layer's colour as changing with the timestamp.
+    Layers without it are assumed to give the same colour for the same
+    (color, x, y) at any timestamp, which lets colours be remembered.
+
+    Usage:  @register
+            @time_dependent
+            def my_special_layer(...):
+    """
+    # This could be applied before or after registration
+    if isinstance(layer, Layer):
+        layer.time_dependent = True
+        func = layer.apply
+    else:
+        func = layer
+    func.__time_dependent__ = True
+    return layer
+
+class vectorized(object):
+    """Simple decorator to add a whole-array kernel to a layer
+
+    The kernel is called as kernel(colors, timestamp, xs, ys), where colors is an
+    (N, 3) integer numpy array and xs, ys are the (N,) positions of each row.
+    It should return what apply would give for every row, as an (N, 3) array.
+    Without numpy installed the kernel is left off, and apply is used instead.
+
+    Usage:  @register
+            @vectorized(my_special_layer_array)
+            def my_special_layer(...):
+    """
+    def __init__(self, kernel):
+        self.kernel = kernel
+
+    def __call__(self, layer: function|Layer):
+        if np is None:
+            return layer
+        # This could be applied before or after registration
+        if isinstance(layer, Layer):
+            layer.apply_array = self.kernel
+            func = layer.apply
+        else:
+            func = layer
+        func.__apply_array__ = self.kernel
+        return layer
+
+def apply_to_array(layer: Layer, colors, timestamp, xs, ys):
+    """
+    Apply a layer to every row of an (N, 3) colour array.
+    Uses the layer's array kernel, or falls back to apply one row at a time.
+    """
+    if layer.apply_array is not None:
+        return layer.apply_array(colors, timestamp, xs, ys)
+    return np.array([
+        layer.apply(tuple(color), timestamp, x, y)
+        for color, x, y in zip(colors.tolist(), xs.tolist(), ys.tolist())
+    ], dtype=np.int64).reshape(-1, 3)
+
 def register(func):
     """
     Layer register function.
@@ -53,9 +127,15 @@ def register(func):
     In order to actually confirm this registration,
     you'll need to import the file containing the layer definition
     """
-    global cur_layer_index
+    global cur_layer_index, name_order_version
     LAYERS[cur_layer_index] = Layer(cur_layer_index, func)
     cur_layer_index += 1
+    # Rank every layer by name again, the new one may sort before others.
+    by_name = sorted((LAYERS[i] for i in range(cur_layer_index)), key=lambda layer: layer.name)
+    for rank, layer in enumerate(by_name):
+        layer.name_rank = rank
+        NAME_ORDER[rank] = layer
+    name_order_version += 1
     return LAYERS[cur_layer_index-1]
 
 def get_layers():
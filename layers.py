@@ -1,57 +1,177 @@
 """
 All layers are defined here.
+
+Layers decorated with @vectorized also have a numpy kernel, which gives the
+same colours as the layer itself for a whole array of squares at once.
 """
 
 import colorsys
-from layer_util import background, register
+from layer_util import background, register, time_dependent, vectorized
+
+try:
+    import numpy as np
+except ImportError:
+    # Kernels are only attached when numpy is installed.
+    np = None
+
+def constant_array(colors, color):
+    """Every row of colors replaced with the same colour."""
+    out = np.empty_like(colors)
+    out[:] = color
+    return out
+
+def hls_channel_array(m1, m2, hue):
+    """colorsys._v over a whole array of hues."""
+    hue = hue % 1.0
+    return np.where(
+        hue < colorsys.ONE_SIXTH,
+        m1 + (m2-m1)*hue*6.0,
+        np.where(
+            hue < 0.5,
+            m2,
+            np.where(hue < colorsys.TWO_THIRD, m1 + (m2-m1)*(colorsys.TWO_THIRD-hue)*6.0, m1),
+        ),
+    )
+
+def rainbow_array(colors, timestamp, xs, ys):
+    h = (timestamp/20 + xs/20 + ys/20) % 1
+    # hls_to_rgb(h, 0.6, 0.6), so l > 0.5.
+    l, s = 0.6, 0.6
+    m2 = l+s-(l*s)
+    m1 = 2.0*l - m2
+    rgb = np.stack([
+        hls_channel_array(m1, m2, h+colorsys.ONE_THIRD),
+        hls_channel_array(m1, m2, h),
+        hls_channel_array(m1, m2, h-colorsys.ONE_THIRD),
+    ], axis=1)
+    return (255*rgb).astype(np.int64)
 
 @register
 @background(200, 0, 120)
+@time_dependent
+@vectorized(rainbow_array)
 def rainbow(color, timestamp, x, y):
     return tuple(
         int(255*x)
         for x in colorsys.hls_to_rgb((timestamp/20 + x/20 + y/20)%1, 0.6, 0.6)
     )
 
+def black_array(colors, timestamp, xs, ys):
+    return constant_array(colors, (0, 0, 0))
+
 @register
 @background(170, 170, 170)
+@vectorized(black_array)
 def black(color, timestamp, x, y):
     return (0, 0, 0)
 
+def lighten_array(colors, timestamp, xs, ys):
+    return np.minimum(colors + 40, 255)
+
 @register
 @background(240, 240, 240)
+@vectorized(lighten_array)
 def lighten(color, timestamp, x, y):
     return tuple(
         min(255, x + 40)
         for x in color
     )
 
+def invert_array(colors, timestamp, xs, ys):
+    return 255 - colors
+
 @register
 @background(0, 255, 255)
+@vectorized(invert_array)
 def invert(color, timestamp, x, y):
     return tuple(
         255 - c
         for c in color
     )
 
+def red_array(colors, timestamp, xs, ys):
+    return constant_array(colors, (255, 0, 0))
+
 @register
 @background(255, 0, 0)
+@vectorized(red_array)
 def red(color, timestamp, x, y):
     return (255, 0, 0)
 
+def green_array(colors, timestamp, xs, ys):
+    return constant_array(colors, (0, 255, 0))
+
 @register
 @background(0, 255, 0)
+@vectorized(green_array)
 def green(color, timestamp, x, y):
     return (0, 255, 0)
 
+def blue_array(colors, timestamp, xs, ys):
+    return constant_array(colors, (0, 0, 255))
+
 @register
 @background(0, 0, 255)
+@vectorized(blue_array)
 def blue(color, timestamp, x, y):
     return (0, 0, 255)
 
+LCG_MULTIPLIER = 1103515245
+LCG_INCREMENT = 12345
+LCG_MODULUS = 1 << 31
+
+def lcg_jump(steps):
+    """
+    (A, C) so that running other = (LCG_MULTIPLIER * other + LCG_INCREMENT) % LCG_MODULUS
+    `steps` times is the same as other = (A * other + C) % LCG_MODULUS.
+    Composes the step with itself by repeated squaring, so O(log steps).
+    """
+    a, c = LCG_MULTIPLIER, LCG_INCREMENT
+    jump_a, jump_c = 1, 0
+    while steps:
+        if steps & 1:
+            jump_a, jump_c = (a * jump_a) % LCG_MODULUS, (a * jump_c + c) % LCG_MODULUS
+        a, c = (a * a) % LCG_MODULUS, (a * c + c) % LCG_MODULUS
+        steps >>= 1
+    return jump_a, jump_c
+
+# Sparkle runs the LCG 10 + (ts * 31 % 17) times, so there are only 17 jumps to know.
+SPARKLE_JUMPS = [lcg_jump(10 + i) for i in range(17)]
+SPARKLE_JUMPS_ARRAY = None if np is None else np.array(SPARKLE_JUMPS, dtype=np.int64)
+
+def sparkle_array(colors, timestamp, xs, ys):
+    ts = ((timestamp + xs/3 + ys/5) * 3).astype(np.int64)
+    jumps = SPARKLE_JUMPS_ARRAY[ts * 31 % 17]
+    jump_a, jump_c = jumps[:, 0], jumps[:, 1]
+    other = (jump_a * xs + jump_c) % LCG_MODULUS
+    other = (jump_a * (other + ys) + jump_c) % LCG_MODULUS
+    other = other >> 16
+    sparkling = (other/(1 << 15) < 0.1)[:, None]
+    return np.where(
+        sparkling,
+        lighten.apply_array(colors, timestamp, xs, ys),
+        darken.apply_array(colors, timestamp, xs, ys),
+    )
+
 @register
 @background(100, 170, 255)
+@time_dependent
+@vectorized(sparkle_array)
 def sparkle(color, timestamp, x, y):
+    ts = int((timestamp + x/3 + y/5) * 3)
+    jump_a, jump_c = SPARKLE_JUMPS[ts * 31 % 17]
+    other = (jump_a * x + jump_c) % LCG_MODULUS
+    other = (jump_a * (other + y) + jump_c) % LCG_MODULUS
+    other = other >> 16
+    if other/(1 << 15) < 0.1:
+        return lighten.apply(color, timestamp, x, y)
+    return darken.apply(color, timestamp, x, y)
+
+def sparkle_loop(color, timestamp, x, y):
+    """
+    The original sparkle, running the LCG one step at a time.
+    Not registered, it is only the reference sparkle is tested and benchmarked against.
+    """
     ts = int((timestamp + x/3 + y/5) * 3)
     other = x
     for _ in range(10 + (ts * 31 % 17)):
@@ -59,14 +179,17 @@ def sparkle(color, timestamp, x, y):
     other += y
     for _ in range(10 + (ts * 31 % 17)):
         other = (1103515245 * other + 12345) % (1 << 31)
-    ts = int((timestamp + x/10 + y/20) * 3)
     other = (other & ((1 << 31)-1)) >> 16
     if other/(1 << 15) < 0.1:
         return lighten.apply(color, timestamp, x, y)
     return darken.apply(color, timestamp, x, y)
 
+def darken_array(colors, timestamp, xs, ys):
+    return np.maximum(colors - 40, 0)
+
 @register
 @background(30, 30, 30)
+@vectorized(darken_array)
 def darken(color, timestamp, x, y):
     return tuple(
         max(0, x - 40)
@@ -1,12 +1,14 @@
 import arcade
 import arcade.key as keys
 import math
+from PIL import Image
 
-from action import PaintAction, PaintStep
+from action import PaintAction
 from grid import Grid
 from layer_util import get_layers, Layer
 from layers import lighten
 from replay import ReplayTracker
+from session_log import SessionLog
 from undo import UndoTracker
 
 
@@ -20,12 +22,25 @@ class MyWindow(arcade.Window):
     SCREEN_TITLE = "Paint"
 
     REPLAY_TIMER_DELTA = 0.05
+    # While replaying, up / down double / halve how many actions play per tick,
+    # and left / right seek back / forward by this fraction of the replay.
+    REPLAY_MAX_ACTIONS_PER_TICK = 1024
+    REPLAY_SEEK_FRACTION = 0.1
+    # If set, every action is also appended to this session log file,
+    # which ReplayTracker.from_log can replay after the window is closed.
+    # A log is of one grid, so "{style}" in it is replaced by the draw style,
+    # for example "session_{style}.psl" keeps one log per draw style.
+    SESSION_LOG_PATH = None
 
     GRID_SIZE_X = 32
     GRID_SIZE_Y = 32
 
     BG = [255, 255, 255]
 
+    # Draw the grid as one texture built from Grid.render,
+    # rather than one rectangle per grid square.
+    BATCHED_GRID_DRAW = True
+
     # SCAFFOLD PART
     # Unless you're adding new features, you shouldn't need to touch this.
 
@@ -41,6 +56,9 @@ class MyWindow(arcade.Window):
         self.y_timer = 0
         self.enable_ui = True
         self.replay_timer = 0
+        self.grid_sprites: arcade.SpriteList = None
+        self.grid_texture: arcade.Texture = None
+        self.grid_texture_version = None
         self.on_init()
 
     def reset(self) -> None:
@@ -126,6 +144,13 @@ class MyWindow(arcade.Window):
         # UI - Draw Modes / Action buttons
         self.action_buttons.draw()
         # Grid
+        if self.BATCHED_GRID_DRAW:
+            self.draw_grid_texture()
+        else:
+            self.draw_grid_squares()
+
+    def draw_grid_squares(self) -> None:
+        """Draw the grid one rectangle per grid square."""
         for x in range(self.GRID_SIZE_X):
             for y in range(self.GRID_SIZE_Y):
                 arcade.draw_lrtb_rectangle_filled(
@@ -136,6 +161,36 @@ class MyWindow(arcade.Window):
                     self.grid[x][y].get_color(self.BG[:], self.timestamp, x, y),
                 )
 
+    def draw_grid_texture(self) -> None:
+        """Draw the grid as a single texture, stretched over the draw panel."""
+        frame = self.grid.render(self.timestamp, self.BG[:])
+        if self.grid_texture is not None and self.grid_texture_version == (self.grid, self.grid.frame_version):
+            # Nothing changed since the last upload.
+            self.grid_sprites.draw(pixelated=True)
+            return
+        self.grid_texture_version = (self.grid, self.grid.frame_version)
+        # Frame rows go from y=0 upwards, images go from the top downwards.
+        image = Image.frombytes(
+            "RGB", (self.GRID_SIZE_X, self.GRID_SIZE_Y), frame.tobytes(),
+        ).transpose(Image.Transpose.FLIP_TOP_BOTTOM).convert("RGBA")
+        if self.grid_texture is None or self.grid_texture.image.size != image.size:
+            self.grid_texture = arcade.Texture(
+                f"grid-{self.GRID_SIZE_X}x{self.GRID_SIZE_Y}", image, hit_box_algorithm="None",
+            )
+            sprite = arcade.Sprite(
+                texture=self.grid_texture,
+                center_x=self.DRAW_PANEL / 2,
+                center_y=self.SCREEN_HEIGHT / 2,
+            )
+            sprite.width = self.DRAW_PANEL
+            sprite.height = self.SCREEN_HEIGHT
+            self.grid_sprites = arcade.SpriteList()
+            self.grid_sprites.append(sprite)
+        else:
+            self.grid_texture.image = image
+            self.grid_sprites.atlas.update_texture_image(self.grid_texture)
+        self.grid_sprites.draw(pixelated=True)
+
     def on_mouse_press(self, x: int, y: int, button: int, modifiers: int) -> None:
         """Called when the mouse buttons are pressed."""
         if x > self.DRAW_PANEL:
@@ -205,6 +260,7 @@ class MyWindow(arcade.Window):
     def on_key_press(self, symbol: int, modifiers: int) -> None:
         """Called when a keyboard key is pressed."""
         if not self.enable_ui:
+            self.on_replay_key(symbol)
             return
         self.z_pressed = keys.Z == symbol and (modifiers & keys.MOD_CTRL)
         self.y_pressed = keys.Y == symbol and (modifiers & keys.MOD_CTRL)
@@ -295,9 +351,25 @@ class MyWindow(arcade.Window):
         self.undo_tracker = UndoTracker()
         self.replay_tracker = ReplayTracker()
 
+    def on_close(self):
+        """Called when the window is closed, closes the session log if there is one."""
+        self.replay_tracker.close()
+        super().on_close()
+
     def on_reset(self):
         """Called when a window reset is requested."""
-        pass
+        # The history was for the old grid, the new one starts a new history
+        # (with the blank grid as a keyframe, so undo_to can jump back to it).
+        self.undo_tracker.reset(self.grid)
+        # The session log records the grid it is of, so a grid of another
+        # style goes to its own log.
+        log = self.replay_tracker.log
+        if self.SESSION_LOG_PATH and (log is None or log.draw_style != self.grid.draw_style):
+            self.replay_tracker.close()
+            self.replay_tracker.log = SessionLog(
+                self.SESSION_LOG_PATH.format(style=self.grid.draw_style),
+                self.grid.draw_style, self.grid.x, self.grid.y,
+            )
 
     def on_paint(self, layer: Layer, px, py):
         """
@@ -318,10 +390,9 @@ class MyWindow(arcade.Window):
         and check if the brush size is lesser equals than the manhattan distance.
         after that it will go through the if statement of checking if the draw_style
         is ts the right one or not and then it will add the layer according to the
-        grid x,y and then it will store the i,j index with the layer into step with the
-        calling of the class paintstep and add the step to get the action .Lastly
-        once the loop is done it will put the action intooo the undo tracker and the
-        replay tracker independently
+        grid x,y. once the loop is done the whole brush is recorded in the action as
+        one stamp (center, brush size, layer), rather than a paintstep per square, and
+        the action is put into the undo tracker and the replay tracker independently
 
         time complexity:
         O(n^2) where n is the brush size
@@ -349,12 +420,11 @@ class MyWindow(arcade.Window):
                         self.grid[i][j].add(layer)
                     elif self.grid.draw_style == Grid.DRAW_STYLE_SEQUENCE:
                         self.grid[i][j].add(layer)
+                    self.grid.mark_dirty(i, j)
 
-                    step = PaintStep((i, j), layer)
-                    self.current_action.add_step(step)
-
-
-        self.undo_tracker.add_action(self.current_action)
+        # One stamp records every square painted above.
+        self.current_action.add_stamp((px, py), brush_size, layer, (self.grid.x, self.grid.y))
+        self.undo_tracker.add_action(self.current_action, self.grid)
         self.replay_tracker.add_action(self.current_action)
 
 
@@ -387,44 +457,18 @@ class MyWindow(arcade.Window):
         """Called when the special action is requested.
 
         Doc:
-        for the special it does the same as the on paint as it also go to grid class
-        and get the special function
-        grid class and the self.current_action is the paintAction class .after that
-        it will go through two loops one for i and one for j withtin the range of
-        the x  and the y after that it will
-        get the manhattan distance with this formula distance = abs(i - px) + abs(j - py)
-        and check if the brush size is lesser equals than the manhattan distance.
-        after that it will go through the if statement of checking if the draw_style
-        is ts the right one or not and then it will add the layer according to the
-        grid x,y and then it will store the i,j index with the layer into step with the
-        calling of the class paintstep and add the step to get the action .Lastly
-        once the loop is done it will put the action intooo the undo tracker and the
-        replay tracker independently
+        for the special it calls the special function of the grid class, which
+        applies it to every square. the action recorded for the undo tracker and
+        the replay tracker is a single special action, as replaying it is just
+        calling the grid special again. undoing it is too, except in sequence
+        style, where the action also keeps the layer removed from each square
+        so undo can add it back (see PaintAction.special)
 
         Time complexity:
-        O(n^2) where n is the length of the one of the grid
-        This is because the code iterates over all cells in the grid, which has n^2 cells in total.
-        as one for x and one for y
+        O(p) where p is the number of painted squares, for grid.special
         """
-        layer = self.grid.special()
-        self.current_action = PaintAction()
-
-        # Apply the layer to the grid with the special mode enabled
-        for i in range(self.grid.x):
-            for j in range(self.grid.y):
-                if self.grid.draw_style == Grid.DRAW_STYLE_SET:
-                    self.grid[i][j].erase(layer)
-                    self.grid[i][j].add(layer)
-                elif self.grid.draw_style == Grid.DRAW_STYLE_ADD:
-                    self.grid[i][j].add(layer)
-                elif self.grid.draw_style == Grid.DRAW_STYLE_SEQUENCE:
-                    self.grid[i][j].add(layer)
-
-                step = PaintStep((i, j), layer)
-                self.current_action.add_step(step)
-
-
-        self.undo_tracker.add_action(self.current_action)
+        self.current_action = PaintAction.special(self.grid)
+        self.undo_tracker.add_action(self.current_action, self.grid)
         self.replay_tracker.add_action(self.current_action)
 
 
@@ -441,15 +485,36 @@ class MyWindow(arcade.Window):
         Returns whether the replay is finished.
 
         Doc:
-        it will check if the replay is done and ready to start the next one
-        by returning true and false (not finish)
+        it plays the next replay_tracker.actions_per_tick actions and checks if the
+        replay is done and ready to start the next one by returning true and false
+        (not finish)
         """
-        if self.replay_tracker.play_next_action(self.grid):
+        if self.replay_tracker.play_tick(self.grid):
             self.on_replay_start()
             #self.replay_tracker.start_replay()
             return True
         return False
 
+    def on_replay_key(self, symbol: int):
+        """
+        Called when a key is pressed during a replay.
+
+        Doc:
+        up and down double and halve the number of actions played per tick (fast
+        forward), left and right seek back and forward by REPLAY_SEEK_FRACTION of
+        the whole replay, using the replay's keyframes
+        """
+        replay = self.replay_tracker
+        if symbol == keys.UP:
+            replay.actions_per_tick = min(self.REPLAY_MAX_ACTIONS_PER_TICK, replay.actions_per_tick * 2)
+        elif symbol == keys.DOWN:
+            replay.actions_per_tick = max(1, replay.actions_per_tick // 2)
+        elif symbol in (keys.LEFT, keys.RIGHT):
+            jump = max(1, int(len(replay) * self.REPLAY_SEEK_FRACTION))
+            if symbol == keys.LEFT:
+                jump = -jump
+            replay.seek(self.grid, min(len(replay), max(0, replay.position + jump)))
+
     def on_increase_brush_size(self):
         """Called when an increase to the brush size is requested."""
         self.grid.increase_brush_size()
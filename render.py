@@ -0,0 +1,373 @@
+"""
+Headless renderer.
+Replays a session log (see session_log) on a Grid without opening a window,
+writing a frame after every tick of the replay, as fast as they can be rendered.
+The grid has the draw style and size recorded in the log's header.
+
+python -m render session.psl -o frames/frame_%05d.png
+python -m render session.psl --scale 4 -o frames/frame_%05d.ppm
+python -m render session.psl --format raw -o - | ffmpeg -f rawvideo -pix_fmt rgb24 -s 128x128 -i - replay.mp4
+python -m render session.psl --workers 8 -o frames/frame_%05d.png
+
+Frames are scaled up scale times and written top row first, the grid's
+y = 0 being the bottom row, as in the window.
+With more than one worker the replay is still played in this process, but
+the frames are rendered (and encoded) in worker processes, a run of
+FRAMES_PER_TASK frames at a time from a snapshot of the grid before the run,
+since a frame only depends on the grid and its timestamp.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import struct
+import sys
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import layers  # registers the layers the log refers to by index
+from data_structures.deque_adt import GrowableDeque
+from grid import Grid, GridSnapshot
+from replay import ReplayTracker
+from replay_compiler import compile_actions
+from session_log import decode_action, encode_action, read_session_log
+
+# The same defaults as main.MyWindow.
+DEFAULT_TIMESTAMP_STEP = 0.05
+DEFAULT_BACKGROUND = (255, 255, 255)
+
+FORMATS = ("png", "ppm", "raw")
+
+# Consecutive frames a worker renders from one snapshot, incrementally after the first.
+FRAMES_PER_TASK = 16
+# Tasks queued per worker, enough to keep them busy while bounding memory.
+TASKS_IN_FLIGHT_PER_WORKER = 2
+
+
+def scale_frame(frame: memoryview, scale: int = 1) -> bytes:
+    """
+    The RGB pixels of a frame from Grid.render, top row first,
+    every square made scale x scale pixels.
+
+    Time complexity:
+    O(p) where p is the number of pixels in the scaled frame
+    """
+    height, width, _ = frame.shape
+    data = frame.tobytes()
+    row_bytes = width * 3
+    rows = []
+    for y in range(height - 1, -1, -1):
+        row = data[y * row_bytes:(y + 1) * row_bytes]
+        if scale > 1:
+            row = b"".join(row[i:i + 3] * scale for i in range(0, row_bytes, 3))
+        rows.extend([row] * scale)
+    return b"".join(rows)
+
+
+def encode_ppm(pixels: bytes, width: int, height: int) -> bytes:
+    """A binary (P6) PPM image of width x height RGB pixels."""
+    return b"P6\n%d %d\n255\n" % (width, height) + pixels
+
+
+def png_chunk(kind: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+def encode_png(pixels: bytes, width: int, height: int, level: int = 6) -> bytes:
+    """
+    A PNG image of width x height RGB pixels, every row unfiltered,
+    compressed with zlib at level.
+    """
+    row_bytes = width * 3
+    raw = b"".join(
+        b"\x00" + pixels[y * row_bytes:(y + 1) * row_bytes] for y in range(height)
+    )
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        + png_chunk(b"IDAT", zlib.compress(raw, level))
+        + png_chunk(b"IEND", b"")
+    )
+
+
+def encode_frame(pixels: bytes, width: int, height: int, image_format: str) -> bytes:
+    if image_format == "png":
+        return encode_png(pixels, width, height)
+    if image_format == "ppm":
+        return encode_ppm(pixels, width, height)
+    return pixels
+
+
+def session_grid(source, draw_style: str | None = None, size: tuple[int, int] | None = None) -> tuple[str, tuple[int, int]]:
+    """
+    The draw style and size of the grid to replay source on: draw_style and size
+    if given, otherwise the ones recorded in source's header, when it is a session log
+    (see session_log.SessionLogStream).
+    :raises ValueError: if one is not given and source does not record it
+    """
+    if draw_style is None:
+        draw_style = getattr(source, "draw_style", None)
+    if size is None and hasattr(source, "x") and hasattr(source, "y"):
+        size = (source.x, source.y)
+    if draw_style is None or size is None:
+        raise ValueError("The draw style and size of the grid are needed for a source that is not a session log")
+    return draw_style, size
+
+
+def replay_frames(
+    source,
+    draw_style: str | None = None,
+    size: tuple[int, int] | None = None,
+    actions_per_frame: int = 1,
+    timestamp_step: float = DEFAULT_TIMESTAMP_STEP,
+    max_frames: int | None = None,
+):
+    """
+    Replays source, any iterable of (PaintAction, is_undo), on a blank grid
+    of draw_style and size, by default those in source's header (see session_grid),
+    and yields (grid, timestamp) for every frame: after every actions_per_frame
+    actions, the n-th frame being at timestamp n * timestamp_step.
+    The first frame is the blank grid and the last one the whole replay.
+    The same grid is yielded every time, changed in place by the next frame.
+
+    Time complexity:
+    O(s) where s is the number of squares the actions touch
+    """
+    draw_style, size = session_grid(source, draw_style, size)
+    grid = Grid(draw_style, *size)
+    replay = ReplayTracker.from_source(source, actions_per_tick=actions_per_frame)
+    replay.start_replay()
+    frame_number = 0
+    while max_frames is None or frame_number < max_frames:
+        # play_tick only finds the end on the tick after the last action.
+        if frame_number > 0 and replay.play_tick(grid):
+            break
+        yield grid, frame_number * timestamp_step
+        frame_number += 1
+
+
+def render_session(
+    source,
+    draw_style: str | None = None,
+    size: tuple[int, int] | None = None,
+    actions_per_frame: int = 1,
+    timestamp_step: float = DEFAULT_TIMESTAMP_STEP,
+    background: tuple[int, int, int] = DEFAULT_BACKGROUND,
+    max_frames: int | None = None,
+):
+    """
+    Yields the frame (from Grid.render) of every frame of replay_frames.
+    The frames are views of one buffer, updated in place by the next frame.
+
+    Time complexity:
+    O(s + f * d) where s is the number of squares the actions touch, f the
+    number of frames and d the squares redrawn per frame (see Grid.render)
+    """
+    for grid, timestamp in replay_frames(source, draw_style, size, actions_per_frame, timestamp_step, max_frames):
+        yield grid.render(timestamp, background)
+
+
+def frame_ticks(source, actions_per_frame: int = 1, max_frames: int | None = None):
+    """
+    Yields the list of (PaintAction, is_undo) played before each frame of
+    replay_frames: none before the first, then actions_per_frame at a time.
+    """
+    if max_frames is not None and max_frames <= 0:
+        return
+    actions = iter(source)
+    yield []
+    frame_number = 1
+    while max_frames is None or frame_number < max_frames:
+        tick = list(islice(actions, actions_per_frame))
+        if not tick:
+            return
+        yield tick
+        frame_number += 1
+
+
+def render_task(
+    snapshot: GridSnapshot,
+    first_frame: int,
+    ticks: list[bytes],
+    timestamp_step: float = DEFAULT_TIMESTAMP_STEP,
+    background: tuple[int, int, int] = DEFAULT_BACKGROUND,
+    scale: int = 1,
+    image_format: str = "raw",
+) -> list[bytes]:
+    """
+    The encoded frames of a run of frames, as run in a worker process.
+    The grid is restored from snapshot, then before each frame the actions
+    of its tick (session log records, see session_log) are played on it.
+
+    Time complexity:
+    O(p + s + f * d) where p is the number of painted squares in the
+    snapshot, s the squares the actions touch, f the number of frames
+    and d the squares redrawn per frame (see Grid.render)
+    """
+    grid = Grid(snapshot.draw_style, snapshot.x, snapshot.y)
+    grid.restore(snapshot)
+    width, height = grid.x * scale, grid.y * scale
+    frames = []
+    for number, records in enumerate(ticks):
+        actions = []
+        offset = 0
+        while offset < len(records):
+            action, is_undo, offset = decode_action(records, offset)
+            actions.append((action, is_undo))
+        compile_actions(actions, grid.draw_style).apply(grid)
+        frame = grid.render((first_frame + number) * timestamp_step, background)
+        frames.append(encode_frame(scale_frame(frame, scale), width, height, image_format))
+    return frames
+
+
+def encode_session(
+    source,
+    draw_style: str | None = None,
+    size: tuple[int, int] | None = None,
+    actions_per_frame: int = 1,
+    timestamp_step: float = DEFAULT_TIMESTAMP_STEP,
+    background: tuple[int, int, int] = DEFAULT_BACKGROUND,
+    max_frames: int | None = None,
+    scale: int = 1,
+    image_format: str = "raw",
+    workers: int = 1,
+):
+    """
+    Yields every frame of the replay of source, scaled and encoded as image_format, in order.
+
+    With one worker the frames are rendered here, incrementally.
+    Otherwise the actions are only played here, and every FRAMES_PER_TASK
+    frames a GridSnapshot (a few ints or bytes per painted square) is sent to
+    a pool of worker processes along with the actions of those frames, encoded
+    as session log records, which render them (see render_task). At most
+    TASKS_IN_FLIGHT_PER_WORKER tasks per worker are waiting at once, so memory
+    stays bounded however long the replay is.
+
+    Time complexity:
+    O(s + f * d) where s is the number of squares the actions touch, f the
+    number of frames and d the squares redrawn per frame (see render_session),
+    the rendering split between the workers, plus O(p) per task to snapshot
+    and restore the p painted squares
+    """
+    draw_style, size = session_grid(source, draw_style, size)
+    width, height = size[0] * scale, size[1] * scale
+    if workers <= 1:
+        for frame in render_session(
+            source, draw_style, size, actions_per_frame, timestamp_step, background, max_frames
+        ):
+            yield encode_frame(scale_frame(frame, scale), width, height, image_format)
+        return
+
+    grid = Grid(draw_style, *size)
+    with ProcessPoolExecutor(workers) as executor:
+        pending = GrowableDeque()
+        ticks = frame_ticks(source, actions_per_frame, max_frames)
+        first_frame = 0
+        while True:
+            snapshot = grid.snapshot()
+            task = []
+            for tick in islice(ticks, FRAMES_PER_TASK):
+                compile_actions(tick, draw_style).apply(grid)
+                task.append(b"".join(encode_action(action, is_undo) for action, is_undo in tick))
+            if not task:
+                break
+            pending.append(executor.submit(
+                render_task, snapshot, first_frame, task, timestamp_step, background, scale, image_format
+            ))
+            first_frame += len(task)
+            if len(pending) >= workers * TASKS_IN_FLIGHT_PER_WORKER:
+                yield from pending.serve().result()
+        while len(pending) > 0:
+            yield from pending.serve().result()
+
+
+def parse_size(text: str) -> tuple[int, int]:
+    width, _, height = text.lower().partition("x")
+    try:
+        return int(width), int(height or width)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid size {text!r}, expected WIDTHxHEIGHT")
+
+
+def parse_color(text: str) -> tuple[int, int, int]:
+    try:
+        color = tuple(int(part) for part in text.split(","))
+    except ValueError:
+        color = ()
+    if len(color) != 3 or not all(0 <= part <= 255 for part in color):
+        raise argparse.ArgumentTypeError(f"Invalid colour {text!r}, expected R,G,B")
+    return color
+
+
+def main(argv: list[str] | None = None) -> int:
+    p = argparse.ArgumentParser(prog="python -m render", description="Render a session log to image frames.")
+    p.add_argument("log", help="The session log to replay.")
+    p.add_argument(
+        "-o", "--output", default="-",
+        help=(
+            "Where to write the frames: a file pattern such as frames/frame_%%05d.png "
+            "for one image per frame, or a file (- for stdout) for a raw RGB stream."
+        ),
+    )
+    p.add_argument("--format", choices=FORMATS, help="Frame format, by default from the output's extension.")
+    p.add_argument(
+        "--style", choices=Grid.DRAW_STYLE_OPTIONS,
+        help="Replay on a grid of this draw style instead of the one the log was painted on.",
+    )
+    p.add_argument("--size", type=parse_size, help="Grid size as WIDTHxHEIGHT, by default the size the log was painted on.")
+    p.add_argument("--scale", type=int, default=1, help="Pixels per grid square along each side.")
+    p.add_argument("--actions-per-frame", type=int, default=1, help="Actions replayed between frames.")
+    p.add_argument("--timestamp-step", type=float, default=DEFAULT_TIMESTAMP_STEP, help="Timestamp added per frame.")
+    p.add_argument("--background", type=parse_color, default=DEFAULT_BACKGROUND, help="Canvas colour as R,G,B.")
+    p.add_argument("--max-frames", type=int, help="Stop after this many frames.")
+    p.add_argument("--workers", type=int, default=1, help="Processes rendering frames, 0 for one per CPU.")
+    args = p.parse_args(argv)
+
+    if args.scale < 1 or args.actions_per_frame < 1:
+        p.error("--scale and --actions-per-frame must be at least 1")
+    image_format = args.format
+    if image_format is None:
+        extension = os.path.splitext(args.output)[1].lower().lstrip(".")
+        image_format = extension if extension in FORMATS else "raw"
+    if image_format != "raw" and "%" not in args.output:
+        p.error("image frames need an output pattern such as frame_%05d." + image_format)
+    if args.workers < 0:
+        p.error("--workers must be at least 0")
+    if args.max_frames is not None and args.max_frames < 0:
+        p.error("--max-frames must be at least 0")
+    try:
+        source = read_session_log(args.log)
+    except (OSError, ValueError) as error:
+        p.error(str(error))
+
+    frames = encode_session(
+        source,
+        args.style,
+        args.size,
+        args.actions_per_frame,
+        args.timestamp_step,
+        args.background,
+        args.max_frames,
+        args.scale,
+        image_format,
+        args.workers or os.cpu_count() or 1,
+    )
+    if image_format == "raw":
+        stream = sys.stdout.buffer if args.output == "-" else open(args.output, "wb")
+        try:
+            for frame in frames:
+                stream.write(frame)
+        finally:
+            if stream is not sys.stdout.buffer:
+                stream.close()
+        return 0
+
+    for number, frame in enumerate(frames):
+        with open(args.output % number, "wb") as file:
+            file.write(frame)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,21 +1,123 @@
 from __future__ import annotations
+import math
+from typing import Iterable
 from action import PaintAction
+from action_stream import ActionStream
 from grid import Grid
-from data_structures.queue_adt import CircularQueue
+from keyframes import Keyframes
+from replay_compiler import compile_actions
+from session_log import SessionLog, SessionLogReader
+from data_structures.deque_adt import GrowableDeque
 
 
 class ReplayTracker:
 
-    def __init__(self):
+    DEFAULT_ACTIONS_PER_TICK = 1
+
+    def __init__(
+        self,
+        keyframes: Keyframes | None = None,
+        actions_per_tick: int = DEFAULT_ACTIONS_PER_TICK,
+        log: SessionLog | None = None,
+    ):
         """
         Doc:
-        set the queue into self.actions and the self.is_replay to false
+        set a growable deque of (action, is_undo) into self.actions and the
+        self.is_replay to false. actions are not served when played, instead
+        self.position is the number of actions played so far, so the replay can
+        also seek back. keyframes are snapshots of the replayed grid by position,
+        taken while playing, which seek restores instead of replaying everything.
+        actions_per_tick is how many actions play_tick plays at once.
+        if log is given every action added is also written to it, so the
+        session can be replayed later with from_log
 
         """
-        self.actions = CircularQueue(max_capacity=1000)
+        self.actions = GrowableDeque()
+        self.log = log
+        self.position = 0
+        self.keyframes = Keyframes() if keyframes is None else keyframes
+        # The furthest position played since the replay started.
+        self.played_to = 0
+        self.actions_per_tick = actions_per_tick
         self.is_replay = False
         self.replay_started = False
 
+    @classmethod
+    def from_log(cls, path: str, keyframes: Keyframes | None = None, actions_per_tick: int = DEFAULT_ACTIONS_PER_TICK) -> ReplayTracker:
+        """
+        A replay of the session log at path, ready to start_replay.
+
+        Doc:
+        the actions are read from the memory mapped log as they are played
+        rather than loaded up front (see session_log.SessionLogReader), so only
+        the replay, not the log, needs to fit in memory. actions cannot be added to it
+
+        time complexity:
+        O(n) where n is the number of actions in the log, to index where each one starts
+        """
+        replay = cls(keyframes, actions_per_tick)
+        replay.actions = SessionLogReader(path)
+        return replay
+
+    @classmethod
+    def from_source(
+        cls,
+        source: Iterable[tuple[PaintAction, bool]],
+        keyframes: Keyframes | None = None,
+        actions_per_tick: int = DEFAULT_ACTIONS_PER_TICK,
+        read_ahead: int = ActionStream.DEFAULT_READ_AHEAD,
+    ) -> ReplayTracker:
+        """
+        A replay of the actions in source, any iterable of (action, is_undo),
+        ready to start_replay.
+
+        Doc:
+        the actions are pulled from source read_ahead at a time as they are played
+        (see action_stream.ActionStream) and dropped once played, so the replay
+        takes constant memory however long the source is, but cannot seek back.
+        for the same reason keyframes default to only keeping the starting grid
+
+        time complexity:
+        O(1)
+        """
+        if keyframes is None:
+            keyframes = Keyframes(every_actions=math.inf, every_cells=math.inf)
+        replay = cls(keyframes, actions_per_tick)
+        replay.actions = ActionStream(source, read_ahead)
+        return replay
+
+    @property
+    def streamed(self) -> bool:
+        """Whether the actions are pulled from a source as they are played."""
+        return isinstance(self.actions, ActionStream)
+
+    def close(self) -> None:
+        """
+        Doc:
+        closes the session log the actions are written to, if there is one,
+        so everything added is on disk
+        """
+        if self.log is not None:
+            self.log.close()
+            self.log = None
+
+    def __len__(self) -> int:
+        """The number of actions in the replay, so far if it is streamed."""
+        return len(self.actions)
+
+    def has_action(self, index: int) -> bool:
+        """Whether the replay has an action at index, reading up to it if it is streamed."""
+        if self.streamed:
+            return self.actions.has(index)
+        return index < len(self.actions)
+
+    def actions_between(self, start: int, end: int):
+        """Yields the actions from index start up to end, or to the last one."""
+        position = start
+        while position < end and self.has_action(position):
+            yield self.actions[position]
+            position += 1
+
 
 
     def start_replay(self) -> None:
@@ -25,18 +127,24 @@ class ReplayTracker:
         Useful if you have any setup to do before `play_next_action` should be called.
 
         Doc:
-        set the self.is_replay to true and to check if the self.replay is true or
-        not if its true clear the queue
+        set the self.is_replay to true, and if a replay was started before, the
+        actions it already played are dropped (along with the keyframes), so only
+        the actions it did not get to or added since are played. the replay then
+        starts from the first action
 
         time complexity:
-        O(1) it is a simple increment
+        O(p) where p is the number of actions already played
 
 
         """
         self.is_replay = True
         if self.replay_started:
-            self.actions.clear()
+            for _ in range(self.position):
+                self.actions.serve()
+            self.keyframes.clear()
         self.replay_started = True
+        self.position = 0
+        self.played_to = 0
 
 
 
@@ -49,10 +157,12 @@ class ReplayTracker:
         Special, Redo, and Draw all have this is False.
 
         Doc:
-        append the action and is_undo value
+        append the action and is_undo value, and write them to the log if there is one
         """
         #if not self.is_replay:
         self.actions.append((action,is_undo))
+        if self.log is not None:
+            self.log.append(action, is_undo)
 
 
 
@@ -64,18 +174,23 @@ class ReplayTracker:
             - Otherwise, return False.
 
         Doc:
-        to check if the queue is empty or not if its empty it means that the replay
-        has ended and return true if not empty then it will serve the action and undo
-        seperately and it will undo or redo the grid layers and return false
+        if every action has been played the replay has ended and it returns true,
+        else the action at self.position is undone or redone on the grid, the
+        position moves past it and it returns false.
+        the grid the replay starts from is kept as the first keyframe, and after
+        that every new position reached may be snapshot as a keyframe
 
         time complexity:
-        O(1)
+        O(1) plus applying the action (and counting the squares it touched)
         """
 
-        if self.actions.is_empty():
+        if self.position == 0 and len(self.keyframes) == 0:
+            self.keyframes.add(0, grid)
+
+        if not self.has_action(self.position):
             return True
 
-        action, is_undo = self.actions.serve()
+        action, is_undo = self.actions[self.position]
 
         if is_undo:
             action.undo_apply(grid)
@@ -83,9 +198,98 @@ class ReplayTracker:
         else:
             action.redo_apply(grid)
 
+        self.position += 1
+        if self.position > self.played_to:
+            self.played_to = self.position
+            self.keyframes.record(self.position, grid, action.cell_count(grid))
+        return False
+
+    def play_tick(self, grid: Grid) -> bool:
+        """
+        Plays the next actions_per_tick actions of the replay, for one tick of playback.
+        Returns True if there were no more actions to play, like play_next_action.
+
+        Doc:
+        see play_to
+
+        time complexity:
+        O(actions_per_tick) actions applied
+        """
+        return self.play_to(grid, self.position + self.actions_per_tick)
+
+    def play_to(self, grid: Grid, step: int) -> bool:
+        """
+        Plays actions until the first `step` have been played, or there are none
+        left. Does nothing if they have already been played.
+        Returns True if there were no more actions to play, like play_next_action.
+
+        Doc:
+        unlike seek this never restores a keyframe and only goes forward. more
+        than one action is compiled first (see replay_compiler), so every square
+        is only touched once per batch of actions instead of once per action,
+        with the same colours as playing them one by one. past the furthest
+        position played the batches stop wherever a keyframe is due, so a long
+        jump forward leaves keyframes behind it as playing one by one would
 
+        time complexity:
+        O(s) where s is the number of squares the actions played touch,
+        plus the keyframes taken
+        """
+        if step <= self.position:
+            return False
+        if step == self.position + 1 or not self.has_action(self.position):
+            return self.play_next_action(grid)
+        if self.position == 0 and len(self.keyframes) == 0:
+            self.keyframes.add(0, grid)
+        while self.position < step:
+            end = step
+            if end > self.played_to:
+                end = min(step, max(self.position, self.played_to) + self.keyframes.actions_until_due())
+            compiled = compile_actions(self.actions_between(self.position, end), grid.draw_style)
+            compiled.apply(grid)
+            self.position += compiled.actions
+            if self.position > self.played_to:
+                self.played_to = self.position
+                self.keyframes.record(self.position, grid, compiled.cells, compiled.actions)
+            if self.position < end:
+                # the actions ran out
+                break
         return False
 
+    def seek(self, grid: Grid, step: int) -> None:
+        """
+        Changes grid to how it was after the first `step` actions of the replay.
+
+        Doc:
+        if step is behind the current position, or the last keyframe at or before
+        step is closer than the current position (counting what restoring it costs),
+        the grid is restored from that keyframe, then the actions up to step are played.
+        raises IndexError if step is not in [0, number of actions], or if the
+        replay is streamed and step is behind the current position
+
+        time complexity:
+        O(min(d, f) + p) where d is the distance from the current position, f the
+        distance from the nearest keyframe (at most about its spacing) and p the
+        painted squares restored
+        """
+        if step < 0 or (not self.streamed and step > len(self.actions)):
+            raise IndexError("No such step in the replay")
+        if self.streamed and step < self.position:
+            raise IndexError("Cannot seek back in a streamed replay")
+        position = self.keyframes.nearest(step)
+        if position is not None and (
+            step < self.position
+            or step - position + self.keyframes.restore_cost(position) < step - self.position
+        ):
+            grid.restore(self.keyframes.snapshot(position))
+            self.position = position
+        if step < self.position:
+            raise IndexError("Cannot seek back before the first action played")
+        self.play_to(grid, step)
+        if self.position < step:
+            # only a streamed replay finds out it is too short by playing it
+            raise IndexError("No such step in the replay")
+
 
 
 
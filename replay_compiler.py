@@ -0,0 +1,173 @@
+"""
+Replay compiler.
+Turns a run of recorded (PaintAction, is_undo) into as few layer store
+operations as leave every square the same colour as playing the actions
+one after the other, so replaying far ahead touches each square once per batch.
+
+What it can safely drop depends on the draw style:
+- every style: consecutive paints (and undos of paints) are merged into one
+  batch, a list of add / erase operations per square, applied in one pass.
+- SET: add replaces whatever layer is there, so on each square everything
+  before its last add is dead, and the rest folds into one add or one clear.
+- SEQUENCE: add / erase of one layer only sets / clears its own bit, so on each
+  square only the last operation on each layer matters.
+- SET and ADD: special is its own inverse (invert toggles, reverse reverses),
+  so a run of specials only needs its count mod 2.
+- SEQUENCE: undoing a special adds back the layers it removed (its steps),
+  so it is batched like a paint.
+Adjacent do / undo pairs are not cancelled as such, since an undo is not an
+exact inverse here: SET erase leaves the layer if it is the one erased, ADD
+erase removes the oldest layer rather than the one added, and SEQUENCE erase
+removes a layer that may have been there before the paint.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+import layer_util
+from grid import Grid
+
+
+@dataclass
+class CompiledReplay:
+    """
+    The result of compile_actions.
+    steps are in order either an int (play that many specials) or a dict from
+    (x, y) to the list of (is_add, layer index) to apply to that square,
+    layer index None with is_add False meaning clear the square (SET only).
+    """
+
+    steps: list = field(default_factory=list)
+    actions: int = 0
+    # Squares the actions touch when played one by one (specials not counted).
+    cells: int = 0
+    # Layer store operations (and specials) left to do once compiled.
+    operations: int = 0
+    # Undone SEQUENCE specials, which flip grid.blank_special back. A special
+    # does nothing to an empty SEQUENCE store, so only the parity matters.
+    blank_flips: int = 0
+
+    def apply(self, grid: Grid) -> None:
+        """
+        Apply every step to grid.
+
+        Time complexity:
+        O(o) where o is self.operations, plus the specials
+        """
+        for step in self.steps:
+            if isinstance(step, int):
+                for _ in range(step):
+                    grid.special()
+                continue
+            for (i, j), ops in step.items():
+                if any(is_add for is_add, _ in ops):
+                    square = grid.paint_square(j * grid.x + i)
+                else:
+                    # Nothing is added, so an unpainted square can stay unpainted.
+                    square = grid[i][j]
+                for is_add, layer_index in ops:
+                    layer = None if layer_index is None else layer_util.LAYERS[layer_index]
+                    if is_add:
+                        square.add(layer)
+                    else:
+                        square.erase(layer)
+                grid.mark_dirty(i, j)
+        if self.blank_flips % 2:
+            grid.blank_special = not grid.blank_special
+
+
+def compile_actions(actions, draw_style: str) -> CompiledReplay:
+    """
+    Compile an iterable of (PaintAction, is_undo), to be played on a grid of draw_style.
+
+    Time complexity:
+    O(s) where s is the number of squares the actions touch
+    """
+    compiled = CompiledReplay()
+    involution = draw_style in (Grid.DRAW_STYLE_SET, Grid.DRAW_STYLE_ADD)
+    cells = {}
+    specials = 0
+
+    def flush_specials():
+        nonlocal cells, specials
+        count = specials % 2 if involution else specials
+        specials = 0
+        if count == 0:
+            # Nothing to do, the batches either side can be merged.
+            return
+        if cells:
+            compiled.steps.append(cells)
+            cells = {}
+        compiled.steps.append(count)
+
+    for action, is_undo in actions:
+        compiled.actions += 1
+        restores = action.is_special and is_undo and draw_style == Grid.DRAW_STYLE_SEQUENCE
+        if action.is_special and not restores:
+            specials += 1
+            continue
+        if specials:
+            flush_specials()
+        if restores:
+            compiled.blank_flips += 1
+        is_add = not is_undo or restores
+        for i, j, layer_index in action.squares():
+            compiled.cells += 1
+            ops = cells.get((i, j))
+            if ops is None:
+                cells[(i, j)] = [(is_add, layer_index)]
+            else:
+                ops.append((is_add, layer_index))
+    flush_specials()
+    if cells:
+        compiled.steps.append(cells)
+
+    for step in compiled.steps:
+        if isinstance(step, int):
+            compiled.operations += step
+            continue
+        if draw_style == Grid.DRAW_STYLE_SET:
+            for square, ops in step.items():
+                step[square] = fold_set_ops(ops)
+        elif draw_style == Grid.DRAW_STYLE_SEQUENCE:
+            for square, ops in step.items():
+                step[square] = fold_sequence_ops(ops)
+        compiled.operations += sum(len(ops) for ops in step.values())
+    return compiled
+
+
+def fold_set_ops(ops: list) -> list:
+    """
+    The operations on one SetLayerStore square, folded from its last add on.
+    After an add the layer is known, so the rest can be worked out here:
+    add sets the layer, erase clears it unless it is the layer erased.
+    Operations before the first add depend on the layer already there, so
+    without any add they are kept as they are.
+    """
+    last_add = None
+    for index in range(len(ops) - 1, -1, -1):
+        if ops[index][0]:
+            last_add = index
+            break
+    if last_add is None:
+        return ops
+    layer = ops[last_add][1]
+    for is_add, layer_index in ops[last_add + 1:]:
+        if is_add:
+            layer = layer_index
+        elif layer_index != layer:
+            layer = None
+    if layer is None:
+        return [(False, None)]
+    return [(True, layer)]
+
+
+def fold_sequence_ops(ops: list) -> list:
+    """
+    The operations on one SequenceLayerStore square, keeping only the last
+    add or erase of each layer, in the order of those last operations.
+    """
+    last = {}
+    for is_add, layer_index in ops:
+        last.pop(layer_index, None)
+        last[layer_index] = is_add
+    return [(is_add, layer_index) for layer_index, is_add in last.items()]
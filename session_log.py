@@ -0,0 +1,305 @@
+"""
+Session log.
+An append-only binary file of the (PaintAction, is_undo) played in a session,
+written as they happen so a session outlives the window, and read back through
+mmap so a replay of millions of actions does not have to hold them in memory.
+
+The file starts with a header describing the grid the session was painted on:
+    MAGIC
+    draw style byte (its index in Grid.DRAW_STYLE_OPTIONS)
+    varint grid x, varint grid y
+then one record per action:
+    varint length of the rest of the record
+    flags byte (FLAG_UNDO, FLAG_SPECIAL, FLAG_BOUNDS)
+    if FLAG_BOUNDS: varint bounds x, varint bounds y
+    per stamp: varint x, varint y, varint radius, layer index byte
+so a one square step costs 5 or 6 bytes, and a whole brush stamp about the same.
+"""
+from __future__ import annotations
+
+import mmap
+import os
+from array import array
+from action import PaintAction
+from grid import Grid
+
+MAGIC = b"PSL2"
+
+FLAG_UNDO = 1
+FLAG_SPECIAL = 2
+FLAG_BOUNDS = 4
+
+
+def encode_varint(value: int, out: bytearray) -> None:
+    """
+    Append value to out as a little endian base 128 varint,
+    7 bits per byte with the top bit set on every byte but the last.
+    """
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def decode_varint(data, offset: int) -> tuple[int, int]:
+    """
+    Read the varint at data[offset].
+    Returns the value and the offset just after it.
+    :raises ValueError: if the data ends in the middle of the varint
+    """
+    value = 0
+    shift = 0
+    while True:
+        if offset >= len(data):
+            raise ValueError("Session log ends in the middle of a varint")
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+def encode_header(draw_style: str, x: int, y: int) -> bytes:
+    """
+    The header of a log of a session painted on a grid of draw_style and size x by y.
+    :raises ValueError: if draw_style is not one of Grid.DRAW_STYLE_OPTIONS
+    """
+    if draw_style not in Grid.DRAW_STYLE_OPTIONS:
+        raise ValueError(f"Unknown draw style {draw_style!r}")
+    header = bytearray(MAGIC)
+    header.append(Grid.DRAW_STYLE_OPTIONS.index(draw_style))
+    encode_varint(x, header)
+    encode_varint(y, header)
+    return bytes(header)
+
+
+def decode_header(data, path: str) -> tuple[str, int, int, int]:
+    """
+    Read the header at the start of data, the contents of the log at path.
+    Returns the draw style, grid x and grid y, and the offset of the first record.
+    :raises ValueError: if data does not start with a session log header
+    """
+    if data[:len(MAGIC)] != MAGIC or len(data) <= len(MAGIC) or data[len(MAGIC)] >= len(Grid.DRAW_STYLE_OPTIONS):
+        raise ValueError(f"{path} is not a session log")
+    draw_style = Grid.DRAW_STYLE_OPTIONS[data[len(MAGIC)]]
+    x, offset = decode_varint(data, len(MAGIC) + 1)
+    y, offset = decode_varint(data, offset)
+    return draw_style, x, y, offset
+
+
+def encode_action(action: PaintAction, is_undo: bool = False) -> bytes:
+    """
+    The record for one action, including its length prefix.
+
+    Time complexity:
+    O(k) where k is the number of stamps in the action
+    """
+    body = bytearray()
+    flags = (FLAG_UNDO if is_undo else 0) | (FLAG_SPECIAL if action.is_special else 0)
+    if action.bounds is not None:
+        flags |= FLAG_BOUNDS
+    body.append(flags)
+    if action.bounds is not None:
+        encode_varint(action.bounds[0], body)
+        encode_varint(action.bounds[1], body)
+    numbers = iter(action.stamps)
+    for x, y, radius, layer_index in zip(numbers, numbers, numbers, numbers):
+        encode_varint(x, body)
+        encode_varint(y, body)
+        encode_varint(radius, body)
+        body.append(layer_index)
+    record = bytearray()
+    encode_varint(len(body), record)
+    return bytes(record + body)
+
+
+def decode_action(data, offset: int) -> tuple[PaintAction, bool, int]:
+    """
+    Read the record at data[offset].
+    Returns the action, whether it was an undo, and the offset of the next record.
+
+    Time complexity:
+    O(k) where k is the number of stamps in the action
+    """
+    length, offset = decode_varint(data, offset)
+    end = offset + length
+    if end > len(data):
+        raise ValueError("Session log ends in the middle of a record")
+    flags = data[offset]
+    offset += 1
+    action = PaintAction(is_special=bool(flags & FLAG_SPECIAL))
+    if flags & FLAG_BOUNDS:
+        x, offset = decode_varint(data, offset)
+        y, offset = decode_varint(data, offset)
+        action.bounds = (x, y)
+    while offset < end:
+        x, offset = decode_varint(data, offset)
+        y, offset = decode_varint(data, offset)
+        radius, offset = decode_varint(data, offset)
+        action.push_stamp(x, y, radius, data[offset])
+        offset += 1
+    return action, bool(flags & FLAG_UNDO), end
+
+
+class SessionLog:
+    """
+    Writes actions to the end of a session log of a session painted on a grid
+    of draw_style and size x by y, creating it (and writing its header) if needed.
+    A log is of a single grid, so appending to a log of another raises ValueError.
+    With flush (the default) every record is handed to the OS as soon as it
+    is appended, so closing the program without close() loses nothing,
+    otherwise records are buffered by the file object until flush or close.
+    """
+
+    def __init__(self, path: str, draw_style: str, x: int, y: int, flush: bool = True) -> None:
+        header = encode_header(draw_style, x, y)
+        self.path = path
+        self.draw_style = draw_style
+        self.x = x
+        self.y = y
+        self.flush_each = flush
+        self.file = open(path, "ab")
+        if self.file.tell() == 0:
+            self.file.write(header)
+            if self.flush_each:
+                self.file.flush()
+        else:
+            with open(path, "rb") as file:
+                found = file.read(len(header))
+            if found != header:
+                self.file.close()
+                raise ValueError(f"{path} is not a session log of a {draw_style} grid of {x}x{y}")
+
+    def append(self, action: PaintAction, is_undo: bool = False) -> None:
+        """
+        Time complexity:
+        O(k) where k is the number of stamps in the action
+        """
+        self.file.write(encode_action(action, is_undo))
+        if self.flush_each:
+            self.file.flush()
+
+    def flush(self) -> None:
+        self.file.flush()
+
+    def close(self) -> None:
+        self.file.close()
+
+    def __enter__(self) -> SessionLog:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class SessionLogReader:
+    """
+    The actions of a session log, memory mapped, as a sequence of (PaintAction, is_undo),
+    with the draw style and size (x, y) of the grid they were painted on.
+
+    Only the offset of every record is kept in memory (8 bytes per action,
+    in an array('Q')), the actions themselves are decoded from the mapped
+    file each time they are read, so the OS pages the file in and out as needed.
+    serve drops the first action, so a ReplayTracker can use it like its deque.
+    A record cut short at the end of the file (say by a crash while writing)
+    is left out.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.file = open(path, "rb")
+        size = os.fstat(self.file.fileno()).st_size
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        try:
+            self.draw_style, self.x, self.y, offset = decode_header(self.data, path)
+        except ValueError:
+            self.close()
+            raise
+        self.offsets = array("Q")
+        self.start = 0
+        while offset < size:
+            try:
+                length, body = decode_varint(self.data, offset)
+            except ValueError:
+                break
+            if body + length > size:
+                break
+            self.offsets.append(offset)
+            offset = body + length
+
+    def __len__(self) -> int:
+        return len(self.offsets) - self.start
+
+    def __getitem__(self, index: int) -> tuple[PaintAction, bool]:
+        """
+        Time complexity:
+        O(k) where k is the number of stamps in the action
+        """
+        if not 0 <= index < len(self):
+            raise IndexError("Session log index out of range")
+        action, is_undo, _ = decode_action(self.data, self.offsets[self.start + index])
+        return action, is_undo
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def serve(self) -> tuple[PaintAction, bool]:
+        """Drops and returns the first action."""
+        item = self[0]
+        self.start += 1
+        return item
+
+    def close(self) -> None:
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self.file.close()
+
+    def __enter__(self) -> SessionLogReader:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class SessionLogStream:
+    """
+    The actions of the session log at path, as an iterable of (PaintAction, is_undo),
+    with the draw style and size (x, y) of the grid they were painted on,
+    which are read when it is made.
+    Unlike SessionLogReader nothing is indexed, each record is decoded
+    as it is reached, so reading a log of any size takes constant memory.
+    A record cut short at the end of the file is left out.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(path, "rb") as file:
+            self.draw_style, self.x, self.y, self.start = decode_header(file.read(len(MAGIC) + 21), path)
+
+    def __iter__(self):
+        """
+        Yields every action, in order.
+
+        Time complexity:
+        O(k) per action where k is the number of stamps in it
+        """
+        with open(self.path, "rb") as file:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                offset = self.start
+                while offset < len(data):
+                    try:
+                        action, is_undo, offset = decode_action(data, offset)
+                    except ValueError:
+                        return
+                    yield action, is_undo
+
+
+def read_session_log(path: str) -> SessionLogStream:
+    """
+    Every (PaintAction, is_undo) in the session log at path, in order,
+    read one at a time (see SessionLogStream).
+    :raises ValueError: if the file is not a session log
+    """
+    return SessionLogStream(path)
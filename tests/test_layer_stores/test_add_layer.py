@@ -62,3 +62,28 @@ class TestAddLayer(unittest.TestCase):
         s.erase(black)
         s.add(invert)
         self.assertEqual(s.get_color((100, 100, 100), 7, 0, 0), (255-91, 255-214, 255-104))
+
+    @number("2.6")
+    def test_special_twice(self):
+        s = AdditiveLayerStore()
+        for layer in (black, lighten, invert):
+            s.add(layer)
+        s.special()
+        self.assertEqual(s.applied_layers(), (invert, lighten, black))
+        s.add(rainbow)
+        s.erase(black)
+        self.assertEqual(s.applied_layers(), (lighten, black, rainbow))
+        s.special()
+        self.assertEqual(s.applied_layers(), (rainbow, black, lighten))
+        self.assertEqual(s.get_color((100, 100, 100), 7, 0, 0), (40, 40, 40))
+
+    @number("2.7")
+    def test_many_layers(self):
+        s = AdditiveLayerStore()
+        for _ in range(151):
+            self.assertTrue(s.add(invert))
+        s.add(black)
+        self.assertEqual(len(s.applied_layers()), 152)
+        self.assertEqual(s.get_color((100, 100, 100), 0, 0, 0), (0, 0, 0))
+        s.special()
+        self.assertEqual(s.get_color((100, 100, 100), 0, 0, 0), (255, 255, 255))
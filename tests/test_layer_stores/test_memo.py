@@ -0,0 +1,55 @@
+import unittest
+from unittest import mock
+from ed_utils.decorators import number
+
+from layer_store import SetLayerStore, AdditiveLayerStore, SequenceLayerStore
+from layers import black, lighten, rainbow, sparkle, invert
+
+class TestColorMemo(unittest.TestCase):
+
+    STORES = (SetLayerStore, AdditiveLayerStore, SequenceLayerStore)
+
+    @number("10.1")
+    def test_time_dependent_flag(self):
+        self.assertTrue(rainbow.time_dependent)
+        self.assertTrue(sparkle.time_dependent)
+        for layer in (black, lighten, invert):
+            self.assertFalse(layer.time_dependent)
+
+    @number("10.2")
+    def test_remembers_static_colors(self):
+        for store_type in self.STORES:
+            s = store_type()
+            s.add(lighten)
+            with mock.patch.object(lighten, "apply", wraps=lighten.apply) as apply:
+                self.assertEqual(s.get_color((100, 100, 100), 0, 2, 3), (140, 140, 140))
+                self.assertEqual(s.get_color((100, 100, 100), 5, 2, 3), (140, 140, 140))
+                self.assertEqual(apply.call_count, 1)
+                # Different start, different colour.
+                self.assertEqual(s.get_color((0, 0, 0), 5, 2, 3), (40, 40, 40))
+                self.assertEqual(apply.call_count, 2)
+
+    @number("10.3")
+    def test_forgets_on_change(self):
+        for store_type in self.STORES:
+            s = store_type()
+            s.add(lighten)
+            self.assertEqual(s.get_color((100, 100, 100), 0, 0, 0), (140, 140, 140))
+            s.add(black)
+            self.assertEqual(s.get_color((100, 100, 100), 0, 0, 0), s.get_color((100, 100, 100), 1, 0, 0))
+            self.assertNotEqual(s.get_color((100, 100, 100), 0, 0, 0), (140, 140, 140))
+        s = SetLayerStore()
+        s.add(lighten)
+        self.assertEqual(s.get_color((100, 100, 100), 0, 0, 0), (140, 140, 140))
+        s.special()
+        self.assertEqual(s.get_color((100, 100, 100), 0, 0, 0), (115, 115, 115))
+        s.erase(black)
+        self.assertEqual(s.get_color((100, 100, 100), 0, 0, 0), (100, 100, 100))
+
+    @number("10.4")
+    def test_time_dependent_not_remembered(self):
+        for store_type in self.STORES:
+            s = store_type()
+            s.add(rainbow)
+            self.assertEqual(s.get_color((100, 100, 100), 7, 0, 0), (91, 214, 104))
+            self.assertEqual(s.get_color((100, 100, 100), 0, 0, 0), rainbow.apply((100, 100, 100), 0, 0, 0))
@@ -69,3 +69,33 @@ class TestSeqLayer(unittest.TestCase):
         self.assertEqual(s.get_color((100, 100, 100), 7, 0, 0), (0, 0, 0))
         s.erase(black)
         self.assertEqual(s.get_color((100, 100, 100), 7, 0, 0), (91, 214, 104))
+
+    @number("3.6")
+    def test_add_erase_changed(self):
+        s = SequenceLayerStore()
+        self.assertTrue(s.add(lighten))
+        self.assertFalse(s.add(lighten))
+        self.assertTrue(s.add(black))
+        self.assertEqual(s.applied_layers(), (black, lighten))
+        self.assertFalse(s.erase(invert))
+        self.assertTrue(s.erase(black))
+        self.assertFalse(s.erase(black))
+        self.assertEqual(s.applied_layers(), (lighten,))
+        self.assertEqual(s.get_color((100, 100, 100), 0, 0, 0), (140, 140, 140))
+
+    @number("3.7")
+    def test_special_median_by_name(self):
+        import random
+        from layer_util import get_layers
+        layers = [layer for layer in get_layers() if layer is not None]
+        rng = random.Random(7)
+        for _ in range(200):
+            s = SequenceLayerStore()
+            applied = rng.sample(layers, rng.randint(0, len(layers)))
+            for layer in applied:
+                s.add(layer)
+            by_name = sorted(applied, key=lambda layer: layer.name)
+            if by_name:
+                by_name.pop((len(by_name) - 1) // 2)
+            s.special()
+            self.assertEqual(s.applied_layers(), tuple(sorted(by_name, key=lambda layer: layer.index)))
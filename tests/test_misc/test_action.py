@@ -0,0 +1,53 @@
+import unittest
+from ed_utils.decorators import number
+
+from action import PaintAction, PaintStep
+from grid import Grid
+from layers import black, red, rainbow
+
+class TestAction(unittest.TestCase):
+
+    @number("16.1")
+    def test_steps_round_trip(self):
+        steps = [PaintStep((3, 4), red), PaintStep((0, 0), black), PaintStep((3, 4), rainbow)]
+        action = PaintAction(steps)
+        self.assertEqual(action.steps, steps)
+        self.assertEqual(list(action.squares()), [(3, 4, red.index), (0, 0, black.index), (3, 4, rainbow.index)])
+        self.assertEqual(list(action.stamps), [3, 4, 0, red.index, 0, 0, 0, black.index, 3, 4, 0, rainbow.index])
+        self.assertIsNone(action.bounds)
+
+    @number("16.2")
+    def test_stamp_squares(self):
+        action = PaintAction()
+        action.add_stamp((1, 1), 2, red, (4, 3))
+        action.add_step(PaintStep((3, 2), black))
+        expected = [
+            (i, j, red.index)
+            for i in range(4) for j in range(3)
+            if abs(i - 1) + abs(j - 1) <= 2
+        ] + [(3, 2, black.index)]
+        self.assertEqual(list(action.squares()), expected)
+        self.assertEqual(action.steps, [PaintStep((i, j), red if index == red.index else black) for i, j, index in expected])
+        self.assertEqual(action.cell_count(Grid(Grid.DRAW_STYLE_SET, 4, 3)), len(expected))
+
+        # Applying the stamp is the same as applying its steps.
+        stamped, stepped = Grid(Grid.DRAW_STYLE_ADD, 4, 3), Grid(Grid.DRAW_STYLE_ADD, 4, 3)
+        action.redo_apply(stamped)
+        for step in action.steps:
+            step.redo_apply(stepped)
+        self.assertEqual(stamped.snapshot(), stepped.snapshot())
+
+    @number("16.3")
+    def test_equality(self):
+        first, second = PaintAction(), PaintAction()
+        first.add_stamp((2, 2), 1, red, (5, 5))
+        second.add_stamp((2, 2), 1, red, (5, 5))
+        self.assertEqual(first, second)
+        self.assertEqual(repr(first), repr(second))
+        self.assertIn("is_special=False", repr(first))
+        second.add_step(PaintStep((0, 0), red))
+        self.assertNotEqual(first, second)
+        self.assertNotEqual(first, PaintAction(is_special=True))
+        self.assertEqual(PaintAction(is_special=True), PaintAction([], is_special=True))
+        with self.assertRaises(TypeError):
+            hash(first)
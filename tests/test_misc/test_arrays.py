@@ -0,0 +1,54 @@
+import unittest
+from ed_utils.decorators import number
+
+from data_structures.array_sorted_list import ArraySortedList
+from data_structures.referential_array import ArrayR, ArrayI
+from data_structures.sorted_list_adt import ListItem
+
+class TestArrays(unittest.TestCase):
+
+    @number("12.1")
+    def test_array_r_slices(self):
+        a = ArrayR(6)
+        self.assertEqual(a[:], [None] * 6)
+        a[0:4] = ["a", "b", "c", "d"]
+        a.move(0, 1, 4)
+        self.assertEqual(a[:], ["a", "a", "b", "c", "d", None])
+        a.move(2, 0, 4)
+        self.assertEqual(a[:], ["b", "c", "d", None, "d", None])
+
+    @number("12.2")
+    def test_array_i(self):
+        a = ArrayI(5)
+        self.assertEqual(list(a[:]), [0] * 5)
+        for i in range(5):
+            a[i] = i * 10
+        a.move(0, 2, 3)
+        self.assertEqual(list(a[:]), [0, 10, 0, 10, 20])
+        a.move(3, 1, 2)
+        self.assertEqual(list(a[:]), [0, 10, 20, 10, 20])
+        a[1:3] = a[3:5]
+        with self.assertRaises(ValueError):
+            a[0:2] = a[0:3]
+        self.assertEqual(len(a), 5)
+        a.fill(7)
+        self.assertEqual(list(a[:]), [7] * 5)
+        with self.assertRaises(ValueError):
+            ArrayI(0)
+
+    @number("12.3")
+    def test_sorted_list_shifts(self):
+        sorted_list = ArraySortedList(1)
+        keys = [5, 1, 9, 3, 7, 3, 0, 8]
+        for key in keys:
+            sorted_list.add(ListItem(str(key), key))
+        self.assertEqual([sorted_list[i].key for i in range(len(sorted_list))], sorted(keys))
+        self.assertEqual(len(sorted_list.array), 8)
+        self.assertEqual(sorted_list.delete_at_index(0).key, 0)
+        self.assertEqual(sorted_list.delete_at_index(3).key, 5)
+        self.assertEqual([sorted_list[i].key for i in range(len(sorted_list))], [1, 3, 3, 7, 8, 9])
+        while len(sorted_list) > 1:
+            sorted_list.delete_at_index(len(sorted_list) // 2)
+        self.assertEqual(sorted_list[0].key, 1)
+        # shrunk once it was under a quarter full
+        self.assertEqual(len(sorted_list.array), 4)
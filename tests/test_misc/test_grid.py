@@ -0,0 +1,79 @@
+import unittest
+from ed_utils.decorators import number
+
+from action import PaintStep
+from layers import black, lighten, red
+from grid import Grid
+
+class TestGrid(unittest.TestCase):
+
+    @number("11.1")
+    def test_unpainted_squares(self):
+        for style in Grid.DRAW_STYLE_OPTIONS:
+            grid = Grid(style, 1000, 1000)
+            self.assertEqual(len(grid.squares), 0)
+            self.assertEqual(grid[999][999].get_color((1, 2, 3), 0, 999, 999), (1, 2, 3))
+            grid[4][999].erase(black)
+            self.assertEqual(len(grid.squares), 0)
+            grid[4][999].add(black)
+            self.assertEqual(len(grid.squares), 1)
+            self.assertEqual(grid[4][999].get_color((1, 2, 3), 0, 4, 999), (0, 0, 0))
+            self.assertEqual(grid[4][-1].get_color((1, 2, 3), 0, 4, 999), (0, 0, 0))
+            with self.assertRaises(IndexError):
+                grid[4][1000]
+
+    @number("11.2")
+    def test_special_before_paint(self):
+        # The special is remembered for squares painted after it.
+        grid = Grid(Grid.DRAW_STYLE_SET, 3, 3)
+        control_grid = Grid(Grid.DRAW_STYLE_SET, 3, 3)
+        for x in range(3):
+            for y in range(3):
+                control_grid.paint_square(y * 3 + x)
+        PaintStep((0, 0), red).redo_apply(grid)
+        PaintStep((0, 0), red).redo_apply(control_grid)
+        grid.special()
+        control_grid.special()
+        PaintStep((1, 1), lighten).redo_apply(grid)
+        PaintStep((1, 1), lighten).redo_apply(control_grid)
+        self.assertEqual(len(grid.squares), 2)
+        for x in range(3):
+            for y in range(3):
+                self.assertEqual(
+                    grid[x][y].get_color((100, 100, 100), 0, x, y),
+                    control_grid[x][y].get_color((100, 100, 100), 0, x, y),
+                )
+        self.assertEqual(grid[1][1].get_color((100, 100, 100), 0, 1, 1), (115, 115, 115))
+
+    @number("11.3")
+    def test_snapshot_restore(self):
+        for style in Grid.DRAW_STYLE_OPTIONS:
+            grid = Grid(style, 6, 6)
+            for i, layer in enumerate((black, lighten, red, lighten)):
+                grid[i][i].add(layer)
+                grid[2][3].add(layer)
+            grid.special()
+            snapshot = grid.snapshot()
+            colors = [[grid[i][j].get_color((9, 9, 9), 0, i, j) for j in range(6)] for i in range(6)]
+            grid[5][5].add(red)
+            grid[2][3].erase(lighten)
+            grid.special()
+            grid.restore(snapshot)
+            self.assertEqual(
+                [[grid[i][j].get_color((9, 9, 9), 0, i, j) for j in range(6)] for i in range(6)],
+                colors,
+            )
+            self.assertEqual(grid.render(0, (9, 9, 9))[5, 5, 0], 9)
+            self.assertTrue(grid.blank_special)
+            with self.assertRaises(ValueError):
+                Grid(style, 5, 6).restore(snapshot)
+
+            # Snapshots only depend on the state, not the order squares were painted in.
+            first, second = Grid(style, 6, 6), Grid(style, 6, 6)
+            first[4][1].add(red)
+            first[0][2].add(black)
+            second[0][2].add(black)
+            second[4][1].add(red)
+            self.assertEqual(first.snapshot(), second.snapshot())
+            self.assertEqual(first.snapshot().painted, 2)
+            self.assertEqual(Grid(style, 6, 6).snapshot().painted, 0)
@@ -0,0 +1,42 @@
+import unittest
+from ed_utils.decorators import number
+
+from layer_util import get_layers, apply_to_array
+from layers import np
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestLayerKernels(unittest.TestCase):
+
+    @number("8.1")
+    def test_kernels_match_apply(self):
+        xs, ys = np.meshgrid(np.arange(40), np.arange(40))
+        xs, ys = xs.ravel(), ys.ravel()
+        colors = np.stack([xs * 6 % 256, ys * 7 % 256, (xs + ys) * 3 % 256], axis=1)
+        for layer in get_layers():
+            if layer is None:
+                break
+            self.assertIsNotNone(layer.apply_array, f"{layer.name} has no kernel")
+            for timestamp in (0, 1, 7, 0.3, 12.345, 100.05):
+                result = layer.apply_array(colors, timestamp, xs, ys)
+                expected = [
+                    tuple(layer.apply(tuple(color), timestamp, x, y))
+                    for color, x, y in zip(colors.tolist(), xs.tolist(), ys.tolist())
+                ]
+                self.assertEqual(
+                    [tuple(row) for row in result.tolist()], expected,
+                    f"{layer.name} kernel differs from apply at timestamp {timestamp}"
+                )
+
+    @number("8.2")
+    def test_fallback(self):
+        from layers import lighten
+        xs = np.array([0, 1, 2])
+        ys = np.array([3, 4, 5])
+        colors = np.array([[0, 0, 0], [100, 200, 250], [255, 255, 255]])
+        kernel = lighten.apply_array
+        try:
+            lighten.apply_array = None
+            result = apply_to_array(lighten, colors, 0, xs, ys)
+        finally:
+            lighten.apply_array = kernel
+        self.assertEqual(result.tolist(), [[40, 40, 40], [140, 240, 255], [255, 255, 255]])
@@ -0,0 +1,98 @@
+import unittest
+from unittest import mock
+from ed_utils.decorators import number
+
+from action import PaintStep
+from layers import green, red, lighten, rainbow, sparkle, invert
+from grid import Grid
+
+class TestRender(unittest.TestCase):
+
+    @number("7.1")
+    def test_shape(self):
+        grid = Grid(Grid.DRAW_STYLE_SET, 4, 3)
+        frame = grid.render(0, (255, 255, 255))
+        self.assertEqual(frame.shape, (3, 4, 3))
+        self.assertEqual(frame.format, "B")
+        self.assertEqual(frame.tobytes(), bytes([255]) * (4 * 3 * 3))
+
+    @number("7.2")
+    def test_matches_get_color(self):
+        for style in Grid.DRAW_STYLE_OPTIONS:
+            grid = Grid(style, 6, 5)
+            grid[1][2].add(green)
+            grid[1][2].add(lighten)
+            grid[3][4].add(rainbow)
+            grid[5][0].add(sparkle)
+            grid[0][0].add(invert)
+            grid.special()
+            for timestamp in (0, 7, 12.345):
+                frame = grid.render(timestamp, (100, 100, 100))
+                self.assertGridMatches(grid, frame, timestamp, (100, 100, 100))
+
+    @number("7.3")
+    def test_without_numpy(self):
+        grid = Grid(Grid.DRAW_STYLE_ADD, 4, 4)
+        grid[2][1].add(rainbow)
+        grid[2][1].add(lighten)
+        with mock.patch("grid.np", None):
+            frame = grid.render(3, (0, 0, 0))
+        self.assertGridMatches(grid, frame, 3, (0, 0, 0))
+
+    @number("7.4")
+    def test_dirty_squares(self):
+        grid = Grid(Grid.DRAW_STYLE_SEQUENCE, 6, 6)
+        PaintStep((1, 1), green).redo_apply(grid)
+        grid.render(0, (0, 0, 0))
+        version = grid.frame_version
+        # Nothing animated and nothing painted, so nothing is redrawn.
+        frame = grid.render(5, (0, 0, 0))
+        self.assertEqual(grid.frame_version, version)
+        self.assertGridMatches(grid, frame, 5, (0, 0, 0))
+
+        PaintStep((2, 3), red).redo_apply(grid)
+        PaintStep((1, 1), green).undo_apply(grid)
+        frame = grid.render(5, (0, 0, 0))
+        self.assertGreater(grid.frame_version, version)
+        self.assertGridMatches(grid, frame, 5, (0, 0, 0))
+
+        # Animated squares are redrawn every frame.
+        PaintStep((4, 0), rainbow).redo_apply(grid)
+        PaintStep((5, 5), sparkle).redo_apply(grid)
+        for timestamp in (6, 7, 8.5):
+            version = grid.frame_version
+            frame = grid.render(timestamp, (0, 0, 0))
+            self.assertGreater(grid.frame_version, version)
+            self.assertGridMatches(grid, frame, timestamp, (0, 0, 0))
+
+        grid.special()
+        frame = grid.render(9, (0, 0, 0))
+        self.assertGridMatches(grid, frame, 9, (0, 0, 0))
+        # A new background redraws everything.
+        frame = grid.render(9, (10, 20, 30))
+        self.assertGridMatches(grid, frame, 9, (10, 20, 30))
+
+    @number("7.5")
+    def test_direct_changes(self):
+        for style in Grid.DRAW_STYLE_OPTIONS:
+            grid = Grid(style, 4, 4)
+            grid[0][0].add(green)
+            first = bytes(grid.render(0, (0, 0, 0)))
+            # Changes straight through grid[x][y] are redrawn too.
+            grid[1][1].add(red)
+            frame = grid.render(0, (0, 0, 0))
+            self.assertNotEqual(bytes(frame), first)
+            self.assertGridMatches(grid, frame, 0, (0, 0, 0))
+            grid[0][0].special()
+            self.assertGridMatches(grid, grid.render(0, (0, 0, 0)), 0, (0, 0, 0))
+            grid[1][1].erase(red)
+            self.assertGridMatches(grid, grid.render(0, (0, 0, 0)), 0, (0, 0, 0))
+
+    def assertGridMatches(self, grid: Grid, frame, timestamp, start):
+        for x in range(grid.x):
+            for y in range(grid.y):
+                self.assertEqual(
+                    tuple(frame[y, x, c] for c in range(3)),
+                    tuple(grid[x][y].get_color(start, timestamp, x, y)),
+                    "Rendered frame does not match get_color."
+                )
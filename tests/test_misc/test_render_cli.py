@@ -0,0 +1,105 @@
+import os
+import struct
+import tempfile
+import unittest
+import zlib
+from ed_utils.decorators import number
+
+from action import PaintAction
+from grid import Grid
+from layers import black, red, rainbow
+from render import encode_png, encode_ppm, encode_session, main, render_session, scale_frame
+from session_log import SessionLog, read_session_log
+
+class TestRenderCli(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "session.psl")
+        with SessionLog(self.path, Grid.DRAW_STYLE_SET, 6, 4) as log:
+            for k in range(5):
+                action = PaintAction()
+                action.add_stamp((k, 0), 1, (red, black, rainbow)[k % 3], (6, 4))
+                log.append(action)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    @number("15.1")
+    def test_scale_and_encode(self):
+        grid = Grid(Grid.DRAW_STYLE_SET, 2, 2)
+        grid[0][0].add(black)
+        pixels = scale_frame(grid.render(0), 2)
+        # y = 0 is the bottom row, so it comes last.
+        self.assertEqual(pixels, bytes([255] * 24 + ([0] * 6 + [255] * 6) * 2))
+        self.assertEqual(encode_ppm(pixels, 4, 4), b"P6\n4 4\n255\n" + pixels)
+
+        png = encode_png(pixels, 4, 4)
+        self.assertEqual(png[:8], b"\x89PNG\r\n\x1a\n")
+        self.assertEqual(struct.unpack(">II", png[16:24]), (4, 4))
+        length = struct.unpack(">I", png[33:37])[0]
+        self.assertEqual(png[37:41], b"IDAT")
+        raw = zlib.decompress(png[41:41 + length])
+        self.assertEqual(raw, b"".join(b"\x00" + pixels[y * 12:(y + 1) * 12] for y in range(4)))
+
+    @number("15.2")
+    def test_render_session(self):
+        frames = [bytes(frame) for frame in render_session(
+            [(action, False) for action in self.actions()], Grid.DRAW_STYLE_SET, (6, 4), actions_per_frame=2
+        )]
+        # The blank grid, then after 2, 4 and 5 actions.
+        self.assertEqual(len(frames), 4)
+        self.assertEqual(frames[0], bytes([255] * 72))
+        grid = Grid(Grid.DRAW_STYLE_SET, 6, 4)
+        for action in self.actions():
+            action.redo_apply(grid)
+        self.assertEqual(frames[-1], bytes(grid.render(3 * 0.05)))
+
+    @number("15.3")
+    def test_main(self):
+        pattern = os.path.join(self.directory.name, "frame_%02d.ppm")
+        self.assertEqual(main([self.path, "-o", pattern, "--scale", "2", "--max-frames", "3"]), 0)
+        self.assertEqual(sorted(os.listdir(self.directory.name)), ["frame_00.ppm", "frame_01.ppm", "frame_02.ppm", "session.psl"])
+        with open(pattern % 2, "rb") as file:
+            # The size comes from the log.
+            self.assertTrue(file.read().startswith(b"P6\n12 8\n255\n"))
+
+        raw = os.path.join(self.directory.name, "frames.rgb")
+        main([self.path, "-o", raw, "--style", "ADD"])
+        self.assertEqual(os.path.getsize(raw), 6 * 6 * 4 * 3)
+
+        # The draw style comes from the log too.
+        sequence_path = os.path.join(self.directory.name, "sequence.psl")
+        with SessionLog(sequence_path, Grid.DRAW_STYLE_SEQUENCE, 6, 4) as log:
+            for action in self.actions():
+                log.append(action)
+            log.append(PaintAction(is_special=True))
+        main([sequence_path, "-o", raw])
+        with open(raw, "rb") as file:
+            frames = file.read()
+        source = [(action, False) for action in self.actions()] + [(PaintAction(is_special=True), False)]
+        self.assertEqual(frames, b"".join(encode_session(source, Grid.DRAW_STYLE_SEQUENCE, (6, 4))))
+        self.assertNotEqual(frames, b"".join(encode_session(source, Grid.DRAW_STYLE_SET, (6, 4))))
+        self.assertRaises(ValueError, list, encode_session(source))
+        with self.assertRaises(SystemExit):
+            main([raw, "-o", raw])
+
+    @number("15.4")
+    def test_workers(self):
+        source = [(action, k % 4 == 3) for k, action in enumerate(self.actions() * 9)]
+        for style in Grid.DRAW_STYLE_OPTIONS:
+            expected = list(encode_session(source, style, (6, 4), 1, 0.5, scale=2, image_format="png"))
+            frames = list(encode_session(source, style, (6, 4), 1, 0.5, scale=2, image_format="png", workers=2))
+            self.assertEqual(len(frames), 46)
+            self.assertEqual(frames, expected)
+        for max_frames in (0, 1, 17):
+            self.assertEqual(
+                [len(list(encode_session(source, Grid.DRAW_STYLE_SET, (6, 4), max_frames=max_frames, workers=workers)))
+                 for workers in (1, 2)],
+                [max_frames, max_frames],
+            )
+        with self.assertRaises(SystemExit):
+            main([self.path, "-o", "-", "--format", "raw", "--max-frames", "-1"])
+
+    def actions(self):
+        return [action for action, _ in read_session_log(self.path)]
@@ -5,6 +5,7 @@ from action import PaintAction, PaintStep
 from replay import ReplayTracker
 from layers import blue, green, red, invert
 from grid import Grid
+from keyframes import Keyframes
 
 class TestReplay(unittest.TestCase):
 
@@ -102,6 +103,101 @@ class TestReplay(unittest.TestCase):
         self.assertGridEqual(grid, control_grid)
         self.assertEqual(replay.play_next_action(grid), True) # Finished.
 
+    @number("5.4")
+    def test_seek(self):
+        grid = Grid(Grid.DRAW_STYLE_ADD, 6, 6)
+        control_grid = Grid(Grid.DRAW_STYLE_ADD, 6, 6)
+        replay = ReplayTracker(Keyframes(every_actions=3))
+        states = [control_grid.snapshot()]
+        for i in range(10):
+            action = PaintAction([PaintStep((i % 6, i // 6), (red, green, blue, invert)[i % 4])])
+            if i % 4 == 3:
+                action = PaintAction([], is_special=True)
+            replay.add_action(action, is_undo=(i == 5))
+            if i == 5:
+                action.undo_apply(control_grid)
+            else:
+                action.redo_apply(control_grid)
+            states.append(control_grid.snapshot())
+        replay.start_replay()
+        for step in (4, 10, 2, 7, 0, 10, 6):
+            replay.seek(grid, step)
+            self.assertEqual(replay.position, step)
+            self.assertEqual(grid.snapshot(), states[step])
+        # Jumping forward still takes a keyframe every 3 actions.
+        self.assertEqual(replay.keyframes.positions, [0, 3, 6, 9])
+        self.assertEqual(replay.play_next_action(grid), False)
+        self.assertEqual(grid.snapshot(), states[7])
+        with self.assertRaises(IndexError):
+            replay.seek(grid, 11)
+
+    @number("5.5")
+    def test_play_to_and_ticks(self):
+        grid = Grid(Grid.DRAW_STYLE_SEQUENCE, 8, 8)
+        control_grid = Grid(Grid.DRAW_STYLE_SEQUENCE, 8, 8)
+        replay = ReplayTracker(actions_per_tick=4)
+        for i in range(10):
+            replay.add_action(PaintAction([PaintStep((i % 8, i // 8), (red, green, blue)[i % 3])]))
+        self.assertEqual(len(replay), 10)
+        replay.start_replay()
+
+        self.assertEqual(replay.play_to(grid, 3), False)
+        self.assertEqual(replay.position, 3)
+        self.assertEqual(replay.play_to(grid, 1), False)
+        self.assertEqual(replay.position, 3)
+        self.assertEqual([replay.play_tick(grid) for _ in range(3)], [False, False, True])
+        self.assertEqual(replay.position, 10)
+        for i in range(10):
+            PaintStep((i % 8, i // 8), (red, green, blue)[i % 3]).redo_apply(control_grid)
+        self.assertGridEqual(grid, control_grid)
+
+        replay.seek(grid, 0)
+        replay.actions_per_tick = 100
+        self.assertEqual(replay.play_tick(grid), False)
+        self.assertGridEqual(grid, control_grid)
+        self.assertEqual(replay.play_to(grid, 20), True)
+
+    @number("5.6")
+    def test_streamed(self):
+        grid = Grid(Grid.DRAW_STYLE_SET, 8, 8)
+        control_grid = Grid(Grid.DRAW_STYLE_SET, 8, 8)
+        pulled = []
+
+        def source():
+            for i in range(2000):
+                pulled.append(i)
+                yield PaintAction([PaintStep((i % 8, i // 8 % 8), (red, green, blue)[i % 3])]), i % 10 == 9
+
+        replay = ReplayTracker.from_source(source(), actions_per_tick=7, read_ahead=16)
+        replay.start_replay()
+        self.assertEqual(pulled, [])
+        self.assertEqual(replay.play_next_action(grid), False)
+        self.assertLessEqual(len(pulled), 16)
+        replay.seek(grid, 500)
+        self.assertEqual(replay.position, 500)
+        with self.assertRaises(IndexError):
+            replay.seek(grid, 499)
+        while not replay.play_tick(grid):
+            self.assertLessEqual(len(replay.actions.buffer), 16)
+        self.assertEqual(replay.position, 2000)
+        self.assertEqual(len(replay), 2000)
+        for action, is_undo in source():
+            if is_undo:
+                action.undo_apply(control_grid)
+            else:
+                action.redo_apply(control_grid)
+        self.assertGridEqual(grid, control_grid)
+        # Only the starting grid is kept.
+        self.assertEqual(len(replay.keyframes), 1)
+
+        replay.add_action(PaintAction([PaintStep((0, 0), blue)]))
+        replay.start_replay()
+        self.assertEqual(len(replay), 1)
+        self.assertEqual(replay.play_to(grid, 5), False)
+        self.assertEqual(replay.play_next_action(grid), True)
+        with self.assertRaises(IndexError):
+            replay.seek(grid, 5)
+
     def assertGridEqual(self, grid1: Grid, grid2: Grid):
         for x in range(len(grid1.grid)):
             for y in range(len(grid1[x])):
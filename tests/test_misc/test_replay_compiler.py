@@ -0,0 +1,72 @@
+import random
+import unittest
+from ed_utils.decorators import number
+
+from action import PaintAction, PaintStep
+from grid import Grid
+from layers import black, lighten, invert, red, rainbow
+from replay_compiler import compile_actions
+
+class TestReplayCompiler(unittest.TestCase):
+
+    def random_actions(self, rng, count, grid):
+        """Random actions, played on grid as they are made."""
+        actions = []
+        for _ in range(count):
+            roll = rng.random()
+            if roll < 0.15:
+                actions.append((PaintAction.special(grid), False))
+                continue
+            if roll < 0.35 and actions:
+                # undo (or redo) of an earlier action
+                action, is_undo = rng.choice(actions)[0], rng.random() < 0.8
+            else:
+                action, is_undo = PaintAction(), False
+                layer = rng.choice((black, lighten, invert, red, rainbow))
+                if rng.random() < 0.5:
+                    action.add_stamp((rng.randrange(5), rng.randrange(5)), rng.randrange(3), layer, (5, 5))
+                else:
+                    action.add_step(PaintStep((rng.randrange(5), rng.randrange(5)), layer))
+            if is_undo:
+                action.undo_apply(grid)
+            else:
+                action.redo_apply(grid)
+            actions.append((action, is_undo))
+        return actions
+
+    def assertSameColors(self, grid1, grid2):
+        for x in range(grid1.x):
+            for y in range(grid1.y):
+                for timestamp in (0, 3):
+                    self.assertEqual(
+                        grid1[x][y].get_color((10, 20, 30), timestamp, x, y),
+                        grid2[x][y].get_color((10, 20, 30), timestamp, x, y),
+                    )
+        self.assertEqual(grid1.blank_special, grid2.blank_special)
+
+    @number("13.1")
+    def test_same_colors(self):
+        rng = random.Random(3)
+        for style in Grid.DRAW_STYLE_OPTIONS:
+            for _ in range(40):
+                played = Grid(style, 5, 5)
+                actions = self.random_actions(rng, rng.randrange(1, 30), played)
+                compiled_grid = Grid(style, 5, 5)
+                compiled = compile_actions(actions, style)
+                compiled.apply(compiled_grid)
+                self.assertEqual(compiled.actions, len(actions))
+                self.assertSameColors(played, compiled_grid)
+
+    @number("13.2")
+    def test_fewer_operations(self):
+        paint = PaintAction()
+        paint.add_stamp((2, 2), 1, red, (5, 5))
+        repaint = PaintAction()
+        repaint.add_stamp((2, 2), 1, black, (5, 5))
+        special = PaintAction(is_special=True)
+        actions = [(paint, False), (special, False), (special, True), (repaint, False), (paint, False)]
+        # Undoing the (empty) SEQUENCE special adds nothing back, instead of being a second special.
+        for style, operations in ((Grid.DRAW_STYLE_SET, 5), (Grid.DRAW_STYLE_ADD, 15), (Grid.DRAW_STYLE_SEQUENCE, 16)):
+            compiled = compile_actions(actions, style)
+            self.assertEqual(compiled.cells, 15)
+            self.assertEqual(compiled.operations, operations)
@@ -0,0 +1,124 @@
+import os
+import tempfile
+import unittest
+from ed_utils.decorators import number
+
+from action import PaintAction, PaintStep
+from grid import Grid
+from layers import black, invert, red, rainbow
+from replay import ReplayTracker
+from session_log import SessionLog, SessionLogReader, encode_action, decode_action, read_session_log
+
+class TestSessionLog(unittest.TestCase):
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".psl")
+        os.close(handle)
+        os.remove(self.path)
+
+    def tearDown(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    @number("14.1")
+    def test_round_trip(self):
+        stamp = PaintAction()
+        stamp.add_stamp((300, 2), 200, rainbow, (1000, 7))
+        steps = PaintAction([PaintStep((1, 2), red), PaintStep((0, 0), black)])
+        special = PaintAction(is_special=True)
+        for action, is_undo in ((stamp, False), (steps, True), (special, False), (special, True)):
+            record = encode_action(action, is_undo)
+            decoded, decoded_undo, end = decode_action(record, 0)
+            self.assertEqual(end, len(record))
+            self.assertEqual(decoded_undo, is_undo)
+            self.assertEqual(decoded.is_special, action.is_special)
+            self.assertEqual(decoded.bounds, action.bounds)
+            self.assertEqual(list(decoded.stamps), list(action.stamps))
+        # A one square step is a few bytes.
+        self.assertLessEqual(len(encode_action(PaintAction([PaintStep((5, 5), red)]))), 6)
+
+    @number("14.2")
+    def test_replay_from_log(self):
+        grid = Grid(Grid.DRAW_STYLE_ADD, 6, 6)
+        control_grid = Grid(Grid.DRAW_STYLE_ADD, 6, 6)
+        with SessionLog(self.path, Grid.DRAW_STYLE_ADD, 6, 6) as log:
+            replay = ReplayTracker(log=log)
+            for k in range(30):
+                action = PaintAction(is_special=(k % 7 == 3))
+                if not action.is_special:
+                    action.add_stamp((k % 6, k // 6), k % 3, (red, invert, black)[k % 3], (6, 6))
+                replay.add_action(action, is_undo=(k % 5 == 4))
+        replay.start_replay()
+        while not replay.play_next_action(control_grid):
+            pass
+
+        loaded = ReplayTracker.from_log(self.path)
+        # A record cut short by a crash is left out.
+        with open(self.path, "ab") as file:
+            file.write(b"\x09\x00")
+        self.assertEqual(len(loaded), 30)
+        loaded.start_replay()
+        while not loaded.play_tick(grid):
+            pass
+        for x in range(6):
+            for y in range(6):
+                self.assertEqual(grid[x][y].get_color((0, 0, 0), 0, x, y),
+                                 control_grid[x][y].get_color((0, 0, 0), 0, x, y))
+        loaded.seek(grid, 10)
+        loaded.actions.close()
+
+        reader = SessionLogReader(self.path)
+        self.assertEqual((reader.draw_style, reader.x, reader.y), (Grid.DRAW_STYLE_ADD, 6, 6))
+        self.assertEqual(len(reader), 30)
+        reader.serve()
+        self.assertEqual(len(reader), 29)
+        self.assertRaises(IndexError, reader.__getitem__, 29)
+        reader.close()
+
+    @number("14.3")
+    def test_not_a_log(self):
+        with open(self.path, "wb") as file:
+            file.write(b"nope")
+        self.assertRaises(ValueError, SessionLogReader, self.path)
+        self.assertRaises(ValueError, read_session_log, self.path)
+        os.remove(self.path)
+        SessionLog(self.path, Grid.DRAW_STYLE_ADD, 300, 7).close()
+        # Appending to it is only for the same grid.
+        SessionLog(self.path, Grid.DRAW_STYLE_ADD, 300, 7).close()
+        self.assertRaises(ValueError, SessionLog, self.path, Grid.DRAW_STYLE_SET, 300, 7)
+        self.assertRaises(ValueError, SessionLog, self.path, Grid.DRAW_STYLE_ADD, 300, 8)
+        self.assertRaises(ValueError, SessionLog, self.path + "2", "OTHER", 1, 1)
+        with SessionLogReader(self.path) as reader:
+            self.assertEqual((reader.draw_style, reader.x, reader.y, len(reader)), (Grid.DRAW_STYLE_ADD, 300, 7, 0))
+
+    @number("14.4")
+    def test_read_streamed(self):
+        with SessionLog(self.path, Grid.DRAW_STYLE_SEQUENCE, 100, 300) as log:
+            for k in range(100):
+                log.append(PaintAction([PaintStep((k, k * 3), red)]), is_undo=(k % 2 == 1))
+        with open(self.path, "ab") as file:
+            file.write(b"\x05\x00")
+        actions = read_session_log(self.path)
+        self.assertEqual((actions.draw_style, actions.x, actions.y), (Grid.DRAW_STYLE_SEQUENCE, 100, 300))
+        actions = list(actions)
+        self.assertEqual(len(actions), 100)
+        self.assertEqual([is_undo for _, is_undo in actions[:3]], [False, True, False])
+        self.assertEqual(list(actions[99][0].stamps), [99, 297, 0, red.index])
+        replay = ReplayTracker.from_source(read_session_log(self.path), actions_per_tick=30)
+        replay.start_replay()
+        grid = Grid(Grid.DRAW_STYLE_SEQUENCE, 100, 300)
+        while not replay.play_tick(grid):
+            pass
+        self.assertEqual(replay.position, 100)
+
+    @number("14.5")
+    def test_flushed_and_closed(self):
+        replay = ReplayTracker(log=SessionLog(self.path, Grid.DRAW_STYLE_SET, 2, 2))
+        replay.add_action(PaintAction([PaintStep((1, 1), red)]))
+        # On disk without closing the log.
+        self.assertEqual(len(list(read_session_log(self.path))), 1)
+        replay.close()
+        self.assertIsNone(replay.log)
+        replay.add_action(PaintAction(is_special=True))
+        replay.close()
+        self.assertEqual(len(list(read_session_log(self.path))), 1)
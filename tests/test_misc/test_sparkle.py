@@ -0,0 +1,32 @@
+import unittest
+from ed_utils.decorators import number
+
+from layers import sparkle, sparkle_loop, np
+
+class TestSparkle(unittest.TestCase):
+
+    TIMESTAMPS = (0, 1, 7, 0.3, 2.5, 12.345, 100.05, 1000)
+
+    @number("9.1")
+    def test_matches_loop(self):
+        for timestamp in self.TIMESTAMPS:
+            for x in range(64):
+                for y in range(64):
+                    self.assertEqual(
+                        sparkle.apply((100, 120, 140), timestamp, x, y),
+                        sparkle_loop((100, 120, 140), timestamp, x, y),
+                    )
+
+    @number("9.2")
+    @unittest.skipIf(np is None, "numpy is not installed")
+    def test_array_matches_loop(self):
+        xs, ys = np.meshgrid(np.arange(128), np.arange(128))
+        xs, ys = xs.ravel(), ys.ravel()
+        colors = np.full((len(xs), 3), 100)
+        for timestamp in self.TIMESTAMPS:
+            result = sparkle.apply_array(colors, timestamp, xs, ys)
+            expected = [
+                sparkle_loop((100, 100, 100), timestamp, x, y)
+                for x, y in zip(xs.tolist(), ys.tolist())
+            ]
+            self.assertEqual([tuple(row) for row in result.tolist()], expected)
@@ -2,9 +2,10 @@ import unittest
 from ed_utils.decorators import number
 
 from action import PaintAction, PaintStep
-from undo import UndoTracker
-from layers import green, red, blue
+from undo import UndoTracker, UndoStats
+from layers import green, red, blue, black, lighten, darken
 from grid import Grid
+from keyframes import Keyframes
 
 class TestUndo(unittest.TestCase):
 
@@ -65,6 +66,153 @@ class TestUndo(unittest.TestCase):
         action = undo.undo(grid)
         self.assertEqual(action, None)
 
+    @number("4.2")
+    def test_stamps(self):
+        grid = Grid(Grid.DRAW_STYLE_ADD, 6, 5)
+        control_grid = Grid(Grid.DRAW_STYLE_ADD, 6, 5)
+        action = PaintAction()
+        action.add_stamp((1, 4), 2, red, (6, 5))
+        action.add_step(PaintStep((5, 0), blue))
+        expected = [
+            PaintStep((i, j), red)
+            for i in range(-1, 4) for j in range(2, 7)
+            if 0 <= i < 6 and 0 <= j < 5 and abs(i - 1) + abs(j - 4) <= 2
+        ] + [PaintStep((5, 0), blue)]
+        self.assertEqual(action.steps, expected)
+
+        undo = UndoTracker()
+        undo.add_action(action)
+        action.redo_apply(grid)
+        for step in expected:
+            step.redo_apply(control_grid)
+        self.assertGridEqual(grid, control_grid)
+        undo.undo(grid)
+        self.assertGridEqual(grid, Grid(Grid.DRAW_STYLE_ADD, 6, 5))
+
+        special = PaintAction(is_special=True)
+        self.assertEqual(special.steps, [])
+        special.redo_apply(grid)
+        self.assertTrue(grid.blank_special)
+
+    @number("4.3")
+    def test_budget(self):
+        grid = Grid(Grid.DRAW_STYLE_ADD, 10, 10)
+        undo = UndoTracker(max_actions=None, max_bytes=None)
+        for i in range(150):
+            undo.add_action(PaintAction([PaintStep((i % 10, i // 15), red)]))
+        self.assertEqual(undo.stats().undoable, 150)
+
+        undo = UndoTracker(max_actions=5)
+        actions = [PaintAction([PaintStep((i, 0), red)]) for i in range(8)]
+        for action in actions:
+            undo.add_action(action)
+        stats = undo.stats()
+        self.assertEqual((stats.undoable, stats.redoable, stats.evicted), (5, 0, 3))
+        self.assertEqual(stats.bytes_used, sum(action.nbytes() for action in actions[3:]))
+        for action in reversed(actions[3:]):
+            self.assertIs(undo.undo(grid), action)
+        self.assertIsNone(undo.undo(grid))
+        self.assertEqual(undo.stats().redoable, 5)
+
+        budget = sum(action.nbytes() for action in actions[:2])
+        undo = UndoTracker(max_actions=None, max_bytes=budget)
+        for action in actions:
+            undo.add_action(action)
+        self.assertEqual(undo.stats().undoable, 2)
+        self.assertLessEqual(undo.stats().bytes_used, budget)
+        undo.undo(grid)
+        undo.add_action(actions[0])
+        self.assertEqual(undo.stats().bytes_used, actions[6].nbytes() + actions[0].nbytes())
+
+    @number("4.4")
+    def test_undo_to(self):
+        grid = Grid(Grid.DRAW_STYLE_SEQUENCE, 8, 8)
+        undo = UndoTracker(keyframes=Keyframes(every_actions=4))
+        undo.keyframe(grid)
+        states = [grid.snapshot()]
+        for i in range(20):
+            action = PaintAction()
+            action.add_stamp((i % 8, (3 * i) % 8), 1, (red, green, blue)[i % 3], (8, 8))
+            if i % 7 == 6:
+                action = PaintAction(is_special=True)
+            action.redo_apply(grid)
+            undo.add_action(action, grid)
+            states.append(grid.snapshot())
+        self.assertEqual(undo.stats().keyframes, 6)
+        for target in (3, 17, 0, 20, 9, 9, 12):
+            undo.move_to(grid, target)
+            self.assertEqual(undo.cursor, target)
+            self.assertEqual(grid.snapshot(), states[target])
+        undo.undo_to(grid, 5)
+        self.assertEqual(grid.snapshot(), states[5])
+        undo.redo_to(grid, 2)
+        self.assertEqual(undo.cursor, 5)
+        # adding after undoing forgets the keyframes that were after the cursor
+        undo.add_action(PaintAction([PaintStep((0, 0), red)]), grid)
+        self.assertEqual(undo.keyframes.nearest(100), 4)
+        with self.assertRaises(IndexError):
+            undo.move_to(grid, 7)
+
+    @number("4.5")
+    def test_sequence_special_undo(self):
+        grid = Grid(Grid.DRAW_STYLE_SEQUENCE, 4, 4)
+        undo = UndoTracker()
+        for layer in (black, lighten, red, darken):
+            action = PaintAction([PaintStep((1, 1), layer)])
+            action.redo_apply(grid)
+            undo.add_action(action)
+        PaintAction([PaintStep((2, 3), green)]).redo_apply(grid)
+        before = grid.snapshot()
+        undo.add_action(PaintAction.special(grid))
+        # darken is the (lower) median name
+        self.assertEqual({layer.name for layer in grid[1][1].applied_layers()}, {"black", "lighten", "red"})
+        self.assertEqual(grid[2][3].applied_layers(), ())
+        undo.undo(grid)
+        self.assertEqual({layer.name for layer in grid[1][1].applied_layers()}, {"black", "lighten", "red", "darken"})
+        self.assertEqual(grid.snapshot(), before)
+        undo.redo(grid)
+        self.assertEqual({layer.name for layer in grid[1][1].applied_layers()}, {"black", "lighten", "red"})
+
+    @number("4.6")
+    def test_move_to_same_either_way(self):
+        for keyframes in (Keyframes(every_actions=1), Keyframes(every_actions=10**9, every_cells=10**9)):
+            grid = Grid(Grid.DRAW_STYLE_SEQUENCE, 6, 6)
+            undo = UndoTracker(keyframes=keyframes)
+            undo.keyframe(grid)
+            states = [grid.snapshot()]
+            for i in range(12):
+                if i % 4 == 3:
+                    action = PaintAction.special(grid)
+                else:
+                    action = PaintAction()
+                    action.add_stamp((i % 6, 2), 2, (black, lighten, red, darken, green)[i % 5], (6, 6))
+                    action.redo_apply(grid)
+                undo.add_action(action, grid)
+                states.append(grid.snapshot())
+            for target in (6, 2, 11, 0, 12, 7, 8):
+                undo.move_to(grid, target)
+                self.assertEqual(grid.snapshot(), states[target])
+            # undo may not exactly reverse a paint, but moving from there is still exact
+            undo.undo(grid)
+            undo.move_to(grid, 7)
+            self.assertEqual(grid.snapshot(), states[7])
+
+    @number("4.7")
+    def test_reset(self):
+        grid = Grid(Grid.DRAW_STYLE_SET, 4, 4)
+        undo = UndoTracker()
+        undo.keyframe(grid)
+        for i in range(3):
+            action = PaintAction([PaintStep((i, i), red)])
+            action.redo_apply(grid)
+            undo.add_action(action, grid)
+        new_grid = Grid(Grid.DRAW_STYLE_ADD, 4, 4)
+        undo.reset(new_grid)
+        self.assertEqual(undo.stats(), UndoStats(0, 0, 0, 0, 1))
+        self.assertIsNone(undo.undo(new_grid))
+        undo.move_to(new_grid, 0)
+        self.assertEqual(new_grid.snapshot(), Grid(Grid.DRAW_STYLE_ADD, 4, 4).snapshot())
+
     def assertGridEqual(self, grid1: Grid, grid2: Grid):
         for x in range(len(grid1.grid)):
             for y in range(len(grid1[x])):
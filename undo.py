@@ -1,15 +1,61 @@
 from __future__ import annotations
+from dataclasses import dataclass
 from action import PaintAction
 from grid import Grid
-from data_structures.stack_adt import ArrayStack
+from keyframes import Keyframes
+from data_structures.deque_adt import GrowableDeque
+
+
+@dataclass
+class UndoStats:
+    """How much history an UndoTracker is keeping."""
+
+    undoable: int
+    redoable: int
+    bytes_used: int
+    evicted: int
+    keyframes: int
+
 
 class UndoTracker:
 
-    def __init__(self):
-        self.undo_stack = ArrayStack(max_capacity=100)
-        self.redo_stack = ArrayStack(max_capacity=100)
+    DEFAULT_MAX_ACTIONS = 10000
+    DEFAULT_MAX_BYTES = 64 * 2**20
 
-    def add_action(self, action: PaintAction) -> None:
+    def __init__(
+        self,
+        max_actions: int | None = DEFAULT_MAX_ACTIONS,
+        max_bytes: int | None = DEFAULT_MAX_BYTES,
+        keyframes: Keyframes | None = None,
+    ):
+        """
+        Doc:
+        the whole history is kept in one growable deque (ring buffer), oldest
+        action at the front, with a cursor: history[:cursor] are the actions that
+        can be undone (the latest at cursor - 1) and history[cursor:] the ones that
+        can be redone (the next at cursor). undo moves the cursor back, redo moves
+        it forward and adding an action first drops everything after the cursor.
+        max_actions and max_bytes are the budget of the history (None for no limit),
+        once either is exceeded the oldest actions are evicted from the front,
+        so the latest actions can always be undone.
+        bytes_used is the sum of PaintAction.nbytes over every kept action.
+        keyframes are snapshots of the grid by position in the whole history
+        (evicted + cursor), taken when actions are added with their grid, that
+        undo_to and redo_to jump to when it is cheaper than stepping, and always
+        when going back (see move_to).
+        exact is whether the grid is known to be exactly as it was at the cursor,
+        which stops being true once an action is undone
+        """
+        self.keyframes = Keyframes() if keyframes is None else keyframes
+        self.max_actions = max_actions
+        self.max_bytes = max_bytes
+        self.history = GrowableDeque()
+        self.cursor = 0
+        self.bytes_used = 0
+        self.evicted = 0
+        self.exact = True
+
+    def add_action(self, action: PaintAction, grid: Grid | None = None) -> None:
         """
         Adds an action to the undo tracker.
 
@@ -18,17 +64,144 @@ class UndoTracker:
 
 
         Doc:
-        for this it will check the stack is full or not if its full then return none unless
-        stack isnt full it will push the action into the stack(undo_stack) and
-        reset the redo stack
+        the actions after the cursor are dropped from the rear, as nothing undone
+        can be redone after a new action, then the action is appended at the
+        cursor and the cursor moves past it. then the oldest actions are evicted
+        until the history fits its budget again.
+        grid is the grid the action has just been applied to, if given it may be
+        snapshot as a keyframe
+
+        time complexity
+        O(1) amortised, as every action is dropped or evicted at most once,
+        plus O(s) to count the s squares the action touched when grid is given
+        """
+        while len(self.history) > self.cursor:
+            self.bytes_used -= self.history.pop().nbytes()
+        self.keyframes.drop_after(self.evicted + self.cursor)
+        self.history.append(action)
+        self.cursor += 1
+        self.bytes_used += action.nbytes()
+        if grid is not None:
+            self.keyframes.record(self.evicted + self.cursor, grid, action.cell_count(grid))
+        self.evict()
+
+    def reset(self, grid: Grid) -> None:
+        """
+        Doc:
+        forgets the whole history and every keyframe, for when grid replaces the
+        grid they were for (a reset or a new draw style), then keeps grid as the
+        first keyframe
+
+        time complexity
+        O(1), plus O(p) for p painted squares of grid
+        """
+        self.history = GrowableDeque()
+        self.cursor = 0
+        self.bytes_used = 0
+        self.evicted = 0
+        self.exact = True
+        self.keyframes.clear()
+        self.keyframe(grid)
+
+    def keyframe(self, grid: Grid) -> None:
+        """
+        Doc:
+        snapshots grid as the state at the cursor, for example the blank grid
+        before anything was painted, so undo_to can jump back to it
+
+        time complexity
+        O(p) for p painted squares
+        """
+        self.keyframes.add(self.evicted + self.cursor, grid)
+
+    def evict(self) -> None:
+        """
+        Doc:
+        serves the oldest actions from the front of the history while it is
+        over max_actions or max_bytes. the latest action is always kept
+
+        time complexity
+        O(e) where e is the number of evicted actions
+        """
+        while self.cursor > 1 and self.over_budget():
+            self.bytes_used -= self.history.serve().nbytes()
+            self.cursor -= 1
+            self.evicted += 1
+        self.keyframes.drop_before(self.evicted)
+
+    def over_budget(self) -> bool:
+        """True if the kept actions exceed max_actions or max_bytes."""
+        if self.max_actions is not None and len(self.history) > self.max_actions:
+            return True
+        return self.max_bytes is not None and self.bytes_used > self.max_bytes
+
+    def stats(self) -> UndoStats:
+        """
+        Doc:
+        the number of actions that can be undone and redone, the bytes they
+        hold and how many actions have been evicted so far
 
         time complexity
-        O(1) it is a simple increment
+        O(1)
+        """
+        return UndoStats(
+            self.cursor, len(self.history) - self.cursor, self.bytes_used, self.evicted, len(self.keyframes)
+        )
+
+    def undo_to(self, grid: Grid, cursor: int) -> None:
+        """
+        Undo until only the first `cursor` kept actions are applied.
+
+        Doc:
+        see move_to, undoing to a cursor after the current one does nothing
+        """
+        if cursor < self.cursor:
+            self.move_to(grid, cursor)
+
+    def redo_to(self, grid: Grid, cursor: int) -> None:
+        """
+        Redo until the first `cursor` kept actions are applied.
+
+        Doc:
+        see move_to, redoing to a cursor before the current one does nothing
+        """
+        if cursor > self.cursor:
+            self.move_to(grid, cursor)
+
+    def move_to(self, grid: Grid, cursor: int) -> None:
+        """
+        Doc:
+        moves the cursor to cursor, changing grid to match, by restoring the last
+        keyframe at or before cursor and redoing the actions from there.
+        undo_apply does not always exactly reverse redo_apply (erasing a layer the
+        square already had before the paint still removes it), so the keyframe is
+        used whenever the cursor goes back or the grid is no longer exact, which
+        makes the grid the same whichever way it got there. going forward from an
+        exact grid, the actions are redone one at a time instead if that is
+        cheaper than restoring (counting what restoring costs, see
+        Keyframes.restore_cost). only with no keyframe at all are actions undone.
+        raises IndexError if cursor is not in [0, number of kept actions]
+
+        Time complexity:
+        O(min(d, f) + p) where d is the distance from the current cursor, f the
+        distance from the nearest keyframe (at most about its spacing) and p the
+        painted squares restored
         """
-        if self.undo_stack.is_full():
-            return
-        self.undo_stack.push(action)
-        self.redo_stack = ArrayStack(max_capacity=100)
+        if not 0 <= cursor <= len(self.history):
+            raise IndexError("No such point in the undo history")
+        position = self.keyframes.nearest(self.evicted + cursor)
+        if position is not None and (
+            cursor < self.cursor
+            or not self.exact
+            or cursor - (position - self.evicted) + self.keyframes.restore_cost(position) < cursor - self.cursor
+        ):
+            grid.restore(self.keyframes.snapshot(position))
+            self.cursor = position - self.evicted
+            self.exact = True
+        while self.cursor > cursor:
+            self.undo(grid)
+        while self.cursor < cursor:
+            self.redo(grid)
 
     def undo(self, grid: Grid) -> PaintAction|None:
         """
@@ -38,22 +211,21 @@ class UndoTracker:
         :return: The action that was undone, or None.
 
         Doc:
-        check the stack if its empty or not if empty return none else
-        it will update the action and pop out the latest layer put into the
-        stack and then the redo_stack is pushed with the action value
-        and using the undo_apply function it apply the grid with that
-        layer and return the action
+        if the cursor is at the start there is nothing to undo and it returns none,
+        else the cursor moves back one, and the action it now points at is undone
+        on the grid with undo_apply and returned. the action stays in the history
+        so it can be redone
 
         time complexity:
-        O(1) as this is just a simple increment of updating the stack
-        but in the worst case it will be O(n)
+        O(1) to move the cursor, plus undo_apply
 
         """
-        if not self.undo_stack:
+        if self.cursor == 0:
             return None
-        action = self.undo_stack.pop()
-        self.redo_stack.push(action)
+        self.cursor -= 1
+        action = self.history[self.cursor]
         action.undo_apply(grid)
+        self.exact = False
         return action
 
     def redo(self, grid: Grid) -> PaintAction|None:
@@ -64,20 +236,17 @@ class UndoTracker:
         :return: The action that was redone, or None.
 
         Doc:
-        same as before check the stack if its empty or not if empty return none else
-        it will update the action and pop out the latest layer put into the
-        stack and then the redo_stack is pushed with the action value
-        and using the redo_apply function it apply the grid with that action
-        layer and return the action
+        if the cursor is at the end of the history there is nothing to redo and it
+        returns none, else the action at the cursor is redone on the grid with
+        redo_apply, the cursor moves past it and the action is returned
 
         Time complexity:
-        O(1) as this is just a simple increment of updating the stack
-        but in the worst case it will be O(n)
+        O(1) to move the cursor, plus redo_apply
 
         """
-        if not self.redo_stack:
+        if self.cursor == len(self.history):
             return None
-        action = self.redo_stack.pop()
-        self.undo_stack.push(action)
+        action = self.history[self.cursor]
+        self.cursor += 1
         action.redo_apply(grid)
         return action